@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Script to benchmark import_users.py on synthetic users, comparing the ways of
+setting the passwords of new users. Nothing is kept: every run is rolled back.
+
+Usage: benchmark_import_users.py [--users N] [--processes N]
+"""
+
+import os
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# import_users.py sets up Django when imported
+sys.path.insert(0, str(Path(__file__).parent))
+import import_users
+
+from django.db import transaction
+
+from tjdests.apps.destinations.models import College, get_college_hash
+
+COLLEGES = [(f'Benchmark College {i}', 'Benchmark, VA') for i in range(50)]
+
+
+def make_users(count):
+    """Generate users in the export format, each with a few decisions."""
+    return [
+        {
+            'username': f'benchmark{i}',
+            'password': 'pbkdf2_sha256$1$salt$hash',
+            'email': f'benchmark{i}@example.com',
+            'first_name': f'First{i}',
+            'last_name': f'Last{i}',
+            'graduation_year': 2021,
+            'publish_data': True,
+            'biography': '',
+            'attending_college_hash': get_college_hash(*COLLEGES[i % 50]),
+            'decisions': [
+                {
+                    'college_hash': get_college_hash(*COLLEGES[(i + j) % 50]),
+                    'college_name': COLLEGES[(i + j) % 50][0],
+                    'college_location': COLLEGES[(i + j) % 50][1],
+                    'decision_type': 'RD',
+                    'admission_status': 'ADMIT',
+                }
+                for j in range(5)
+            ],
+            'test_scores': [{'exam_type': 'SAT_TOTAL', 'exam_score': 1500}],
+        }
+        for i in range(count)
+    ]
+
+
+def time_import(users, hash_passwords):
+    """Time importing the users, rolling the import back afterwards."""
+    with transaction.atomic():
+        College.objects.bulk_create(College(name=name, location=location) for name, location in COLLEGES)
+
+        start_time = time.monotonic()
+        import_users.import_users(users, hash_passwords=hash_passwords)
+        elapsed = time.monotonic() - start_time
+        transaction.set_rollback(True)
+    return elapsed
+
+
+def main():
+    """Main function to run the benchmark."""
+    parser = argparse.ArgumentParser(description='Benchmark importing users.')
+    parser.add_argument('--users', type=int, default=200, help='Number of users to import (default: 200)')
+    parser.add_argument('--processes', type=int, default=None, help='Processes for hashing (default: one per CPU)')
+    args = parser.parse_args()
+
+    users = make_users(args.users)
+
+    results = []
+    with import_users.RandomPasswordHasher(args.processes) as hasher:
+        modes = [
+            ('Random passwords, hashed serially (previous behaviour)',
+             lambda count: [import_users.make_random_password_hash() for _ in range(count)]),
+            (f'Random passwords, hashed by {hasher.processes} processes', hasher),
+            ('Unusable passwords (default)', import_users.make_unusable_password_hashes),
+        ]
+        for name, hash_passwords in modes:
+            elapsed = time_import(users, hash_passwords)
+            results.append((name, elapsed))
+
+    print(f"\nImported {args.users} users:")
+    for name, elapsed in results:
+        print(f"  {name}: {elapsed:.2f}s ({elapsed * 1000 / args.users:.2f}s per 1,000 users)")
+
+
+if __name__ == '__main__':
+    main()
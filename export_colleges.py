@@ -1,14 +1,17 @@
 #!/usr/bin/env python3
 """
 Script to export college data from Django database to JSON format.
-Each college is keyed by a unique identifier based on name and location.
+Each college is keyed by its hash, an MD5 of its name and location (College.hash).
+
+With --since, only colleges modified at or after the given time are exported.
+
+Usage: export_colleges.py [-o colleges_export.json] [--since TIMESTAMP]
 """
 
 import os
 import sys
 import json
-import hashlib
-import re
+import argparse
 from pathlib import Path
 
 # Add the project to Python path
@@ -19,26 +22,32 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tjdests.settings')
 import django
 django.setup()
 
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
 from tjdests.apps.destinations.models import College
 
 
-def generate_unique_id(name, location):
-    """Generate a unique identifier based on college name and location."""
-    # Use MD5 hash of name and location
-    combined = f"{name}|{location}"
-    return hashlib.md5(combined.encode()).hexdigest()
+def parse_since(value):
+    """Parse a --since timestamp (ISO 8601), in the current time zone if it has none."""
+    since = parse_datetime(value)
+    if since is None:
+        raise argparse.ArgumentTypeError(f'invalid timestamp: {value!r}')
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    return since
 
 
-def export_colleges_to_json():
-    """Export all colleges from database to JSON format."""
+def export_colleges_to_json(since=None):
+    """Export all colleges (or those modified since the given time) from database to JSON format."""
     colleges = College.objects.all()
+    if since is not None:
+        colleges = colleges.filter(last_modified__gte=since)
     
     college_data = {}
     
     for college in colleges:
-        unique_id = generate_unique_id(college.name, college.location)
-        
-        college_data[unique_id] = {
+        college_data[college.hash] = {
             'id': college.id,
             'name': college.name,
             'location': college.location
@@ -49,15 +58,25 @@ def export_colleges_to_json():
 
 def main():
     """Main function to export college data and save to JSON file."""
+    parser = argparse.ArgumentParser(description='Export colleges to JSON.')
+    parser.add_argument('-o', '--output', default='colleges_export.json')
+    parser.add_argument(
+        '--since', type=parse_since, default=None,
+        help='Only export colleges modified at or after this time (ISO 8601)'
+    )
+    args = parser.parse_args()
+
     try:
-        college_data = export_colleges_to_json()
+        started_at = timezone.now()
+        college_data = export_colleges_to_json(args.since)
         
         # Save to JSON file
-        output_file = 'colleges_export.json'
+        output_file = args.output
         with open(output_file, 'w', encoding='utf-8') as f:
             json.dump(college_data, f, indent=2, ensure_ascii=False)
         
         print(f"Exported {len(college_data)} colleges to {output_file}")
+        print(f"Next delta: --since {started_at.isoformat()}")
         
         # Print sample of the data
         if college_data:
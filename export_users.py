@@ -1,13 +1,30 @@
 #!/usr/bin/env python3
 """
 Script to export user data with their decisions and test scores from Django database to JSON format.
-Uses MD5 hash for college identifiers matching export_colleges.py format.
+Colleges are identified by College.hash, matching export_colleges.py format.
+
+Users are read in chunks and written out as they are read, so memory use does
+not grow with the number of users. The output is either one JSON object keyed
+by user ID (the default) or NDJSON, one user per line with their ID under
+"id", and is gzipped if the output file name ends in .gz.
+
+With --since, only users changed since the given time are exported: those whose
+account, decisions or test scores were modified (or deleted) at or after it.
+Each changed user is exported in full, so import_users.py brings the other side
+up to date with it. Users deleted since then are exported as
+{"username": ..., "deleted": true}, keyed by "deleted:<username>", for
+import_users.py --sync to delete. The time to pass as --since for the next
+delta is printed at the end.
+
+Usage: export_users.py [-o users_export.json] [--format json|ndjson] [--chunk-size N]
+                       [--since TIMESTAMP]
 """
 
 import os
 import sys
 import json
-import hashlib
+import gzip
+import argparse
 from pathlib import Path
 
 # Add the project to Python path
@@ -18,113 +35,219 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tjdests.settings')
 import django
 django.setup()
 
-from tjdests.apps.authentication.models import User
-from tjdests.apps.destinations.models import Decision, TestScore, College
-
-
-def generate_college_hash(name, location):
-    """Generate MD5 hash for college based on name and location."""
-    combined = f"{name}|{location}"
-    return hashlib.md5(combined.encode()).hexdigest()
-
-
-def export_users_to_json():
-    """Export all users with their decisions and test scores to JSON format."""
-    users = User.objects.all().prefetch_related('decision_set', 'testscore_set')
-    
-    user_data = {}
-    
-    for user in users:
-        # Get user's decisions
-        decisions = []
-        for decision in user.decision_set.all():
-            college_hash = generate_college_hash(decision.college.name, decision.college.location)
-            decisions.append({
-                'college_hash': college_hash,
-                'college_name': decision.college.name,
-                'college_location': decision.college.location,
-                'decision_type': decision.decision_type,
-                'admission_status': decision.admission_status,
-                'last_modified': decision.last_modified.isoformat() if decision.last_modified else None
-            })
-        
-        # Get user's test scores
-        test_scores = []
-        for score in user.testscore_set.all():
-            test_scores.append({
-                'exam_type': score.exam_type,
-                'exam_score': score.exam_score,
-                'last_modified': score.last_modified.isoformat() if score.last_modified else None
-            })
-        
-        # Get attending college hash if it exists
-        attending_college_hash = None
-        if user.attending_decision and user.attending_decision.college:
-            attending_college_hash = generate_college_hash(
-                user.attending_decision.college.name,
-                user.attending_decision.college.location
-            )
-        
-        user_data[str(user.id)] = {
-            'username': user.username,
-            'password': user.password,
-            'first_name': user.first_name,
-            'last_name': user.last_name,
-            'email': user.email,
-            'nickname': getattr(user, 'nickname', '') or '',
-            'use_nickname': getattr(user, 'use_nickname', False),
-            'preferred_name': getattr(user, 'preferred_name', '') or '',
-            'graduation_year': user.graduation_year,
-            'gpa': float(user.GPA) if user.GPA else None,
-            'is_student': user.is_student,
-            'is_staff': user.is_staff,
-            'is_superuser': user.is_superuser,
-            'is_banned': user.is_banned,
-            'accepted_terms': user.accepted_terms,
-            'publish_data': user.publish_data,
-            'biography': getattr(user, 'biography', '') or '',
-            'attending_college_hash': attending_college_hash,
-            'decisions': decisions,
-            'test_scores': test_scores,
-            'last_modified': user.last_modified.isoformat() if user.last_modified else None
-        }
-    
-    return user_data
+from django.db.models import Prefetch, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from tjdests.apps.authentication.models import DeletedUser, User
+from tjdests.apps.destinations.models import Decision, TestScore
+
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+def parse_since(value):
+    """Parse a --since timestamp (ISO 8601), in the current time zone if it has none."""
+    since = parse_datetime(value)
+    if since is None:
+        raise argparse.ArgumentTypeError(f'invalid timestamp: {value!r}')
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    return since
+
+
+def get_changed_users(since):
+    """Get the users whose account, decisions or test scores changed at or after since."""
+    return User.objects.filter(
+        Q(last_modified__gte=since)
+        | Q(id__in=Decision.objects.filter(last_modified__gte=since).values('user_id'))
+        | Q(id__in=TestScore.objects.filter(last_modified__gte=since).values('user_id'))
+    )
+
+
+def get_deleted_usernames(since):
+    """Get the usernames of users deleted at or after since, and not created again."""
+    return DeletedUser.objects.filter(deleted_at__gte=since).exclude(
+        username__in=User.objects.values('username')
+    ).order_by('username').values_list('username', flat=True)
+
+
+def iterate_users(chunk_size=DEFAULT_CHUNK_SIZE, since=None):
+    """
+    Iterate over all users (or those changed since the given time) with their
+    decisions, test scores and attending college, fetching chunk_size users
+    (and their related rows) at a time.
+    """
+    users = User.objects.all() if since is None else get_changed_users(since)
+    users = users.select_related('attending_decision__college').prefetch_related(
+        Prefetch('decision_set', queryset=Decision.objects.select_related('college')),
+        'testscore_set',
+    ).order_by('id')
+
+    # Each chunk starts after the last user of the previous one, so that
+    # prefetching works on any Django version and no chunk needs an OFFSET
+    last_id = 0
+    while True:
+        chunk = list(users.filter(id__gt=last_id)[:chunk_size])
+        if not chunk:
+            return
+        yield from chunk
+        last_id = chunk[-1].id
+
+
+def serialize_user(user):
+    """Get the export entry for a user, with their decisions and test scores."""
+    # Get user's decisions
+    decisions = []
+    for decision in user.decision_set.all():
+        decisions.append({
+            'college_hash': decision.college.hash,
+            'college_name': decision.college.name,
+            'college_location': decision.college.location,
+            'decision_type': decision.decision_type,
+            'admission_status': decision.admission_status,
+            'last_modified': decision.last_modified.isoformat() if decision.last_modified else None
+        })
+
+    # Get user's test scores
+    test_scores = []
+    for score in user.testscore_set.all():
+        test_scores.append({
+            'exam_type': score.exam_type,
+            'exam_score': score.exam_score,
+            'last_modified': score.last_modified.isoformat() if score.last_modified else None
+        })
+
+    # Get attending college hash if it exists
+    attending_college_hash = None
+    if user.attending_decision and user.attending_decision.college:
+        attending_college_hash = user.attending_decision.college.hash
+
+    return {
+        'username': user.username,
+        'password': user.password,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'email': user.email,
+        'nickname': getattr(user, 'nickname', '') or '',
+        'use_nickname': getattr(user, 'use_nickname', False),
+        'preferred_name': getattr(user, 'preferred_name', '') or '',
+        'graduation_year': user.graduation_year,
+        'gpa': float(user.GPA) if user.GPA else None,
+        'is_student': user.is_student,
+        'is_staff': user.is_staff,
+        'is_superuser': user.is_superuser,
+        'is_banned': user.is_banned,
+        'accepted_terms': user.accepted_terms,
+        'publish_data': user.publish_data,
+        'biography': getattr(user, 'biography', '') or '',
+        'attending_college_hash': attending_college_hash,
+        'decisions': decisions,
+        'test_scores': test_scores,
+        'last_modified': user.last_modified.isoformat() if user.last_modified else None
+    }
+
+
+def open_output(output_file):
+    """Open the output file for writing text, gzipped if it ends in .gz."""
+    if output_file.endswith('.gz'):
+        return gzip.open(output_file, 'wt', encoding='utf-8')
+    return open(output_file, 'w', encoding='utf-8')
+
+
+def export_users(f, output_format='json', chunk_size=DEFAULT_CHUNK_SIZE, since=None):
+    """
+    Write every user (or those changed since the given time, followed by
+    those deleted since then) to the open file f as they are read.
+    Yields the ID and entry of each user written, for reporting.
+    """
+    def iterate_entries():
+        for user in iterate_users(chunk_size, since):
+            yield str(user.id), serialize_user(user)
+        if since is not None:
+            for username in get_deleted_usernames(since).iterator():
+                yield f'deleted:{username}', {'username': username, 'deleted': True}
+
+    if output_format == 'json':
+        # Written piece by piece, but the same as json.dump(..., indent=2)
+        f.write('{')
+        separator = '\n'
+        for user_id, entry in iterate_entries():
+            entry_json = json.dumps(entry, indent=2, ensure_ascii=False).replace('\n', '\n  ')
+            f.write(f'{separator}  {json.dumps(user_id)}: {entry_json}')
+            separator = ',\n'
+            yield user_id, entry
+        f.write('\n}' if separator != '\n' else '}')
+    else:
+        for user_id, entry in iterate_entries():
+            f.write(json.dumps({'id': user_id, **entry}, ensure_ascii=False))
+            f.write('\n')
+            yield user_id, entry
 
 
 def main():
     """Main function to export user data and save to JSON file."""
+    parser = argparse.ArgumentParser(description='Export users to JSON.')
+    parser.add_argument(
+        '-o', '--output', default='users_export.json',
+        help='Output file, gzipped if it ends in .gz (default: users_export.json)'
+    )
+    parser.add_argument('--format', choices=['json', 'ndjson'], default='json', dest='output_format')
+    parser.add_argument(
+        '--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+        help=f'Number of users to read at a time (default: {DEFAULT_CHUNK_SIZE})'
+    )
+    parser.add_argument(
+        '--since', type=parse_since, default=None,
+        help='Only export users changed at or after this time (ISO 8601)'
+    )
+    args = parser.parse_args()
+
     try:
-        user_data = export_users_to_json()
-        
-        # Save to JSON file
-        output_file = 'users_export.json'
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(user_data, f, indent=2, ensure_ascii=False)
-        
-        print(f"Exported {len(user_data)} users to {output_file}")
-        
+        # Anything changed while exporting is exported again by the next delta,
+        # which is harmless since importing a user twice changes nothing
+        started_at = timezone.now()
+        user_count = 0
+        deleted_count = 0
+        total_decisions = 0
+        total_test_scores = 0
+        first_user = None
+
+        with open_output(args.output) as f:
+            for user_id, entry in export_users(f, args.output_format, args.chunk_size, args.since):
+                if entry.get('deleted'):
+                    deleted_count += 1
+                    continue
+                user_count += 1
+                total_decisions += len(entry['decisions'])
+                total_test_scores += len(entry['test_scores'])
+                if first_user is None:
+                    first_user = (user_id, entry)
+
+        if args.since is not None:
+            print(f"Exported {user_count} users changed since {args.since.isoformat()} to {args.output}")
+            print(f"Exported {deleted_count} users deleted since then")
+        else:
+            print(f"Exported {user_count} users to {args.output}")
+        print(f"Next delta: --since {started_at.isoformat()}")
+
         # Print summary statistics
-        total_decisions = sum(len(user['decisions']) for user in user_data.values())
-        total_test_scores = sum(len(user['test_scores']) for user in user_data.values())
-        
         print(f"Total decisions: {total_decisions}")
         print(f"Total test scores: {total_test_scores}")
-        
+
         # Print sample of the data
-        if user_data:
+        if first_user is not None:
+            first_user_id, first_user = first_user
             print("\nSample user entry:")
-            first_user_id = next(iter(user_data))
-            first_user = user_data[first_user_id]
             print(f"  User ID {first_user_id}:")
             print(f"    Name: {first_user['first_name']} {first_user['last_name']}")
             print(f"    Decisions: {len(first_user['decisions'])}")
             print(f"    Test Scores: {len(first_user['test_scores'])}")
-        
+
     except Exception as e:
         print(f"Error exporting users: {e}")
         sys.exit(1)
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
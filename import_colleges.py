@@ -1,12 +1,13 @@
 #!/usr/bin/env python3
 """
 Script to import college data from colleges_export.json back into the Django database.
-Skips colleges that already exist in the database.
+Skips colleges that already exist in the database, which are loaded once up
+front, and inserts the rest in batches.
+The export is parsed incrementally, so it is never all in memory at once.
 """
 
 import os
 import sys
-import json
 from pathlib import Path
 
 # Add the project to Python path
@@ -17,60 +18,56 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tjdests.settings')
 import django
 django.setup()
 
+from json_stream import iter_json_object
+from tjdests.apps.destinations.cache import invalidate_colleges
+from tjdests.apps.destinations.management.commands.import_ceeb import add_colleges
 from tjdests.apps.destinations.models import College
-from django.db import IntegrityError
 
+DEFAULT_BATCH_SIZE = 1000
 
-def import_colleges_from_json(json_file='colleges_export.json'):
+
+def import_colleges_from_json(json_file='colleges_export.json', batch_size=DEFAULT_BATCH_SIZE):
     """Import colleges from JSON file into the database."""
     
     if not os.path.exists(json_file):
         print(f"Error: {json_file} not found!")
         return
     
-    with open(json_file, 'r', encoding='utf-8') as f:
-        college_data = json.load(f)
+    total_count = 0
     
-    imported_count = 0
-    skipped_count = 0
-    error_count = 0
+    print(f"Importing colleges from {json_file}")
     
-    print(f"Found {len(college_data)} colleges in {json_file}")
+    # Load every existing college once, rather than querying for each one
+    existing = set(College.objects.values_list('name', 'location'))
     
-    for hash_key, college_info in college_data.items():
-        name = college_info['name']
-        location = college_info['location']
-        
-        try:
-            # Check if college already exists
-            existing_college = College.objects.filter(name=name, location=location).first()
+    imported_count = 0
+    new_colleges = []
+    with open(json_file, 'r', encoding='utf-8') as f:
+        for hash_key, college_info in iter_json_object(f):
+            total_count += 1
+            key = (college_info['name'], college_info['location'])
             
-            if existing_college:
-                print(f"Skipping existing college: {name} - {location}")
-                skipped_count += 1
+            if key in existing:
                 continue
             
-            # Create new college
-            new_college = College.objects.create(
-                name=name,
-                location=location
-            )
-            
-            print(f"Imported: {name} - {location} (ID: {new_college.id})")
-            imported_count += 1
-            
-        except IntegrityError as e:
-            print(f"Error importing {name} - {location}: {e}")
-            error_count += 1
-        except Exception as e:
-            print(f"Unexpected error importing {name} - {location}: {e}")
-            error_count += 1
+            existing.add(key)
+            new_colleges.append(College(name=key[0], location=key[1]))
+            if len(new_colleges) >= batch_size:
+                # Any college added since the existing ones were loaded is
+                # skipped, as in import_ceeb
+                imported_count += len(add_colleges(new_colleges))
+                new_colleges = []
+    
+    if new_colleges:
+        imported_count += len(add_colleges(new_colleges))
+    
+    # Bulk inserts do not send the signals that invalidate this
+    invalidate_colleges()
     
     print(f"\nImport Summary:")
     print(f"  Imported: {imported_count}")
-    print(f"  Skipped (already exists): {skipped_count}")
-    print(f"  Errors: {error_count}")
-    print(f"  Total processed: {len(college_data)}")
+    print(f"  Skipped (already exists): {total_count - imported_count}")
+    print(f"  Total processed: {total_count}")
 
 
 def main():
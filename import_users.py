@@ -2,19 +2,42 @@
 """
 Script to import user data from users_export.json back into the Django database.
 - Saves original password to PasswordHash table
-- Generates random password for user model
-- Creates associated Decisions and TestScores
+- Gives new users an unusable password, since they log in with the saved
+  hash (or, with --random-passwords, a random one, hashed by a process pool)
+- Creates associated Decisions and TestScores, or updates them for users that
+  already exist, so importing an export (or a delta from export_users.py
+  --since) again changes nothing; with --sync, decisions and test scores of
+  imported users that are not in the export are deleted, as are users that
+  a delta lists as deleted
 - Associates decisions with colleges using college hashes
+
+Users are imported in batches, each written with a handful of bulk queries in
+one transaction. If a batch fails, its users are retried one at a time so that
+a bad user only fails itself, as before. The export is parsed incrementally and
+only one batch of users is in memory at a time, so memory use does not grow
+with the size of the export.
+
+With --workers N on PostgreSQL, batches are imported concurrently by N worker
+processes, each with its own database connection. SQLite only allows one writer
+at a time, so there the import stays in one process.
+
+Usage: import_users.py [users_export.json] [--batch-size N]
+                       [--random-passwords [--processes N]] [--sync] [--workers N]
 """
 
 import os
 import sys
 import json
-import hashlib
+import gzip
+import time
 import secrets
 import string
+import argparse
+import itertools
+import multiprocessing
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from pathlib import Path
-from datetime import datetime
 
 # Add the project to Python path
 sys.path.insert(0, str(Path(__file__).parent / 'tjdests'))
@@ -25,17 +48,24 @@ import django
 django.setup()
 
 from django.contrib.auth.hashers import make_password
+from django.utils import timezone
 from django.utils.dateparse import parse_datetime
-from django.db import IntegrityError, transaction
+from django.db import IntegrityError, connection, transaction
 
+from json_stream import iter_json_object
 from tjdests.apps.authentication.models import User, PasswordHash
 from tjdests.apps.destinations.models import College, Decision, TestScore
+from tjdests.apps.destinations.search import get_search_backend
+from tjdests.apps.destinations.stats import rebuild_college_stats
 
+DEFAULT_BATCH_SIZE = 500
 
-def generate_college_hash(name, location):
-    """Generate MD5 hash for college based on name and location."""
-    combined = f"{name}|{location}"
-    return hashlib.md5(combined.encode()).hexdigest()
+# User fields set from the export, other than the biography
+USER_FIELDS = [
+    'email', 'first_name', 'last_name', 'nickname', 'use_nickname', 'preferred_name',
+    'graduation_year', 'GPA', 'is_student', 'is_staff', 'is_superuser', 'is_banned',
+    'accepted_terms', 'publish_data',
+]
 
 
 def generate_random_password(length=12):
@@ -44,191 +74,532 @@ def generate_random_password(length=12):
     return ''.join(secrets.choice(characters) for _ in range(length))
 
 
-def find_college_by_hash(college_hash, colleges_cache=None):
-    """Find college by its hash, with optional caching."""
-    if colleges_cache is None:
-        colleges_cache = {}
-    
-    if college_hash in colleges_cache:
-        return colleges_cache[college_hash]
-    
-    # Try to find college by generating hashes for all colleges
-    for college in College.objects.all():
-        generated_hash = generate_college_hash(college.name, college.location)
-        colleges_cache[generated_hash] = college
-        if generated_hash == college_hash:
-            return college
-    
-    return None
-
-
-def import_users_from_json(json_file='users_export.json'):
-    """Import users from JSON file into the database."""
-    
-    if not os.path.exists(json_file):
-        print(f"Error: {json_file} not found!")
-        return
-    
-    with open(json_file, 'r', encoding='utf-8') as f:
-        user_data = json.load(f)
-    
+def make_random_password_hash(_=None):
+    """Hash a random password. Runs in a worker process with --random-passwords."""
+    return make_password(generate_random_password())
+
+
+def make_random_password_hashes(count):
+    """Hash count random passwords in this process, as each worker does with --workers."""
+    return [make_random_password_hash() for _ in range(count)]
+
+
+def make_unusable_password_hashes(count):
+    """Get count unusable passwords, which are cheap as nothing is hashed."""
+    return [make_password(None) for _ in range(count)]
+
+
+class RandomPasswordHasher:
+    """
+    Hashes random passwords across a pool of processes, since with the default
+    hasher each one takes a large fraction of a second of CPU time.
+    """
+
+    def __init__(self, processes=None):
+        self.processes = processes or os.cpu_count() or 1
+        self.pool = ProcessPoolExecutor(self.processes)
+
+    def __call__(self, count):
+        chunksize = max(1, count // (self.processes * 4))
+        return list(self.pool.map(make_random_password_hash, range(count), chunksize=chunksize))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.pool.shutdown()
+
+
+def load_colleges_by_hash():
+    """Map the hash of every college to the college, using the stored hashes."""
+    return {college.hash: college for college in College.objects.all()}
+
+
+def create_missing_colleges(users, colleges_cache):
+    """Create the colleges of any decisions that do not match an existing college."""
+    missing = {}
+    for user_info in users:
+        for decision_info in user_info.get('decisions', []):
+            college_hash = decision_info['college_hash']
+            if college_hash not in colleges_cache and college_hash not in missing:
+                missing[college_hash] = (
+                    decision_info.get('college_name', f'Unknown College {college_hash[:8]}'),
+                    decision_info.get('college_location', 'Unknown Location'),
+                )
+
+    for college_hash, (college_name, college_location) in missing.items():
+        college, created = College.objects.get_or_create(
+            name=college_name,
+            location=college_location
+        )
+
+        if created:
+            print(f"Created missing college: {college_name} - {college_location}")
+
+        colleges_cache[college_hash] = college
+
+
+def get_user_fields(user_info):
+    """Get the values of USER_FIELDS for a user in the export."""
+    return {
+        'email': user_info['email'],
+        'first_name': user_info['first_name'],
+        'last_name': user_info['last_name'],
+        'nickname': user_info.get('nickname', ''),
+        'use_nickname': user_info.get('use_nickname', False),
+        'preferred_name': user_info.get('preferred_name', ''),
+        'graduation_year': user_info.get('graduation_year'),
+        'GPA': user_info.get('gpa'),
+        'is_student': user_info.get('is_student', False),
+        'is_staff': user_info.get('is_staff', False),
+        'is_superuser': user_info.get('is_superuser', False),
+        'is_banned': user_info.get('is_banned', False),
+        'accepted_terms': user_info.get('accepted_terms', False),
+        'publish_data': user_info.get('publish_data', False),
+    }
+
+
+def parse_last_modified(info):
+    """Get the last_modified time of a decision or test score in the export."""
+    return parse_datetime(info['last_modified']) if info.get('last_modified') else None
+
+
+def import_test_scores(batch, user_ids, sync=False):
+    """
+    Create the test scores of a batch of users that they do not already have.
+    With sync, also delete any test scores of theirs that are not in the batch.
+    """
+    # Scores have no natural key, so a score is only created if the user does not
+    # already have one with the same exam type and score
+    existing = defaultdict(list)
+    for score in TestScore.objects.filter(user_id__in=user_ids.values()):
+        existing[score.user_id, score.exam_type, score.exam_score].append(score.id)
+
+    test_scores = []
+    for user_info in batch:
+        user_id = user_ids[user_info['username']]
+        for score_info in user_info.get('test_scores', []):
+            matching = existing[user_id, score_info['exam_type'], score_info['exam_score']]
+            if matching:
+                matching.pop()
+                continue
+            test_scores.append(TestScore(
+                user_id=user_id,
+                exam_type=score_info['exam_type'],
+                exam_score=score_info['exam_score'],
+                last_modified=parse_last_modified(score_info)
+            ))
+
+    TestScore.objects.bulk_create(test_scores)
+    if sync:
+        TestScore.objects.filter(id__in=[i for ids in existing.values() for i in ids]).delete()
+
+
+def import_decisions(batch, user_ids, colleges_cache, sync=False):
+    """
+    Create or update the decisions of a batch of users, matched by (user, college).
+    With sync, also delete any decisions of theirs that are not in the batch.
+    """
+    existing = {
+        (decision.user_id, decision.college_id): decision
+        for decision in Decision.objects.filter(user_id__in=user_ids.values())
+    }
+
+    new_decisions = {}
+    matched_decisions = {}
+    updated_decisions = {}
+    for user_info in batch:
+        user_id = user_ids[user_info['username']]
+        for decision_info in user_info.get('decisions', []):
+            key = (user_id, colleges_cache[decision_info['college_hash']].id)
+            decision_type = decision_info.get('decision_type')
+            admission_status = decision_info['admission_status']
+
+            decision = existing.pop(key, None) or matched_decisions.get(key)
+            if decision is None:
+                # The last of any duplicates in the export wins
+                new_decisions[key] = Decision(
+                    user_id=user_id,
+                    college_id=key[1],
+                    decision_type=decision_type,
+                    admission_status=admission_status,
+                    last_modified=parse_last_modified(decision_info)
+                )
+                continue
+
+            matched_decisions[key] = decision
+            if (decision.decision_type, decision.admission_status) != (decision_type, admission_status):
+                decision.decision_type = decision_type
+                decision.admission_status = admission_status
+                decision.last_modified = parse_last_modified(decision_info) or timezone.now()
+                updated_decisions[key] = decision
+
+    Decision.objects.bulk_create(new_decisions.values())
+    Decision.objects.bulk_update(
+        updated_decisions.values(), ['decision_type', 'admission_status', 'last_modified']
+    )
+    if sync:
+        Decision.objects.filter(id__in=[decision.id for decision in existing.values()]).delete()
+
+
+def import_batch(batch, colleges_cache, hash_passwords=make_unusable_password_hashes, sync=False):
+    """
+    Import a batch of users with bulk queries. Must be called in a transaction.
+    hash_passwords(count) returns the password hashes for count new users.
+    Decisions and test scores already in the database are updated rather than
+    duplicated, so importing the same users again changes nothing. With sync,
+    the decisions and test scores of each user are made to match the export.
+    Returns the number of users created.
+    """
+    usernames = [user_info['username'] for user_info in batch]
+    existing_users = User.objects.in_bulk(usernames, field_name='username')
+
+    new_users = []
+    updated_users = []
+    for user_info in batch:
+        user = existing_users.get(user_info['username'])
+        if user is None:
+            user = User(
+                username=user_info['username'],
+                use_additional_hashes=True,  # Enable additional hashes
+                **get_user_fields(user_info),
+            )
+            new_users.append(user)
+        else:
+            for field, value in get_user_fields(user_info).items():
+                setattr(user, field, value)
+            updated_users.append(user)
+
+        # Only set biography if it's not empty after stripping
+        biography = user_info.get('biography', '').strip()
+        if biography:
+            user.biography = biography
+            user.render_biography()
+
+    for user, password in zip(new_users, hash_passwords(len(new_users))):
+        user.password = password
+    User.objects.bulk_create(new_users)
+    User.objects.bulk_update(
+        updated_users, USER_FIELDS + ['biography', 'biography_html', 'biography_html_hash']
+    )
+
+    # Not every database returns the IDs of bulk inserted rows
+    user_ids = dict(User.objects.filter(username__in=usernames).values_list('username', 'id'))
+    users_with_hashes = set(
+        PasswordHash.objects.filter(user_id__in=user_ids.values()).values_list('user_id', flat=True)
+    )
+
+    password_hashes = []
+    for user_info in batch:
+        user_id = user_ids[user_info['username']]
+
+        # Store original password in PasswordHash table (only for new users or if not exists)
+        if user_info.get('password') and user_id not in users_with_hashes:
+            password_hashes.append(PasswordHash(user_id=user_id, password_hash=user_info['password']))
+
+    PasswordHash.objects.bulk_create(password_hashes)
+    import_test_scores(batch, user_ids, sync)
+    import_decisions(batch, user_ids, colleges_cache, sync)
+
+    # Set attending decisions, found by (user, college) since each is unique
+    attending = {}
+    for user_info in batch:
+        user_id = user_ids[user_info['username']]
+        attending_college_hash = user_info.get('attending_college_hash')
+        imported_hashes = {d['college_hash'] for d in user_info.get('decisions', [])}
+        if attending_college_hash and attending_college_hash in imported_hashes:
+            attending[user_id] = colleges_cache[attending_college_hash].id
+        elif sync and not attending_college_hash:
+            attending[user_id] = None
+
+    if attending:
+        attending_users = [
+            User(id=user_id, attending_decision_id=None)
+            for user_id, college_id in attending.items() if college_id is None
+        ]
+        decision_ids = Decision.objects.filter(
+            user_id__in=attending.keys(), college_id__in=attending.values()
+        ).values_list('user_id', 'college_id', 'id')
+        for user_id, college_id, decision_id in decision_ids:
+            if attending[user_id] == college_id:
+                attending_users.append(User(id=user_id, attending_decision_id=decision_id))
+        User.objects.bulk_update(attending_users, ['attending_decision'])
+
+    return len(new_users)
+
+
+def iter_batches(items, batch_size):
+    """Split an iterable into lists of batch_size items."""
+    iterator = iter(items)
+    while True:
+        batch = list(itertools.islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def import_batch_or_users(batch, colleges_cache, hash_passwords=make_unusable_password_hashes, sync=False):
+    """
+    Import a batch of users in one transaction. If that fails, its users are
+    retried one at a time so that a bad user only fails itself.
+    Returns the number of users imported, created and failed.
+    """
+    try:
+        with transaction.atomic():
+            return len(batch), import_batch(batch, colleges_cache, hash_passwords, sync), 0
+    except Exception as e:
+        print(f"Error importing batch, retrying its users one at a time: {e}")
+
     imported_count = 0
-    skipped_count = 0
+    created_count = 0
     error_count = 0
-    colleges_cache = {}
-    
-    print(f"Found {len(user_data)} users in {json_file}")
-    
-    for user_id, user_info in user_data.items():
+    for user_info in batch:
+        username = user_info['username']
         try:
             with transaction.atomic():
-                username = user_info['username']
-                
-                # Check if user already exists
-                user, created = User.objects.get_or_create(
-                    username=username,
-                    defaults={
-                        'email': user_info['email'],
-                        'first_name': user_info['first_name'],
-                        'last_name': user_info['last_name'],
-                        'nickname': user_info.get('nickname', ''),
-                        'use_nickname': user_info.get('use_nickname', False),
-                        'preferred_name': user_info.get('preferred_name', ''),
-                        'graduation_year': user_info.get('graduation_year'),
-                        'GPA': user_info.get('gpa'),
-                        'is_student': user_info.get('is_student', False),
-                        'is_staff': user_info.get('is_staff', False),
-                        'is_superuser': user_info.get('is_superuser', False),
-                        'is_banned': user_info.get('is_banned', False),
-                        'accepted_terms': user_info.get('accepted_terms', False),
-                        'publish_data': user_info.get('publish_data', False),
-                        'use_additional_hashes': True,  # Enable additional hashes
-                    }
-                )
-                
-                if created:
-                    # Generate random password for new user
-                    random_password = generate_random_password()
-                    user.set_password(random_password)
-                    
-                    # Only set biography if it's not empty after stripping
-                    biography = user_info.get('biography', '').strip()
-                    if biography:
-                        user.biography = biography
-                    
-                    user.save()
-                    print(f"Created new user: {username}")
-                else:
-                    # Update existing user
-                    user.email = user_info['email']
-                    user.first_name = user_info['first_name']
-                    user.last_name = user_info['last_name']
-                    user.nickname = user_info.get('nickname', '')
-                    user.use_nickname = user_info.get('use_nickname', False)
-                    user.preferred_name = user_info.get('preferred_name', '')
-                    user.graduation_year = user_info.get('graduation_year')
-                    user.GPA = user_info.get('gpa')
-                    user.is_student = user_info.get('is_student', False)
-                    user.is_staff = user_info.get('is_staff', False)
-                    user.is_superuser = user_info.get('is_superuser', False)
-                    user.is_banned = user_info.get('is_banned', False)
-                    user.accepted_terms = user_info.get('accepted_terms', False)
-                    user.publish_data = user_info.get('publish_data', False)
-                    
-                    # Only update biography if it's not empty after stripping
-                    biography = user_info.get('biography', '').strip()
-                    if biography:
-                        user.biography = biography
-                    
-                    user.save()
-                    print(f"Updated existing user: {username}")
-                
-                # Store original password in PasswordHash table (only for new users or if not exists)
-                if user_info.get('password') and (created or not user.additional_hashes.exists()):
-                    PasswordHash.objects.create(
-                        user=user,
-                        password_hash=user_info['password']
-                    )
-                
-                # Import test scores
-                for score_info in user_info.get('test_scores', []):
-                    TestScore.objects.create(
-                        user=user,
-                        exam_type=score_info['exam_type'],
-                        exam_score=score_info['exam_score'],
-                        last_modified=parse_datetime(score_info['last_modified']) if score_info.get('last_modified') else None
-                    )
-                
-                # Import decisions
-                attending_decision = None
-                for decision_info in user_info.get('decisions', []):
-                    college_hash = decision_info['college_hash']
-                    college = find_college_by_hash(college_hash, colleges_cache)
-                    
-                    if not college:
-                        # Try to create college from the decision info
-                        college_name = decision_info.get('college_name', f'Unknown College {college_hash[:8]}')
-                        college_location = decision_info.get('college_location', 'Unknown Location')
-                        
-                        college, created = College.objects.get_or_create(
-                            name=college_name,
-                            location=college_location
-                        )
-                        
-                        if created:
-                            print(f"Created missing college: {college_name} - {college_location}")
-                        
-                        # Update cache
-                        colleges_cache[college_hash] = college
-                    
-                    decision = Decision.objects.create(
-                        user=user,
-                        college=college,
-                        decision_type=decision_info.get('decision_type'),
-                        admission_status=decision_info['admission_status'],
-                        last_modified=parse_datetime(decision_info['last_modified']) if decision_info.get('last_modified') else None
-                    )
-                    
-                    # Check if this is the attending college
-                    attending_college_hash = user_info.get('attending_college_hash')
-                    if attending_college_hash and attending_college_hash == college_hash:
-                        attending_decision = decision
-                
-                # Set attending decision if found
-                if attending_decision:
-                    user.attending_decision = attending_decision
-                    user.save()
-                
-                action = "Created" if created else "Updated"
-                print(f"{action} user: {username} (ID: {user.id}) with {len(user_info.get('decisions', []))} decisions and {len(user_info.get('test_scores', []))} test scores")
-                imported_count += 1
-                
+                created_count += import_batch([user_info], colleges_cache, hash_passwords, sync)
+            imported_count += 1
         except IntegrityError as e:
             print(f"Integrity error importing {username}: {e}")
             error_count += 1
         except Exception as e:
             print(f"Unexpected error importing {username}: {e}")
             error_count += 1
-    
+
+    return imported_count, created_count, error_count
+
+
+def import_users(users, batch_size=DEFAULT_BATCH_SIZE, hash_passwords=make_unusable_password_hashes,
+                 sync=False):
+    """
+    Import users from the export, given as an iterable that is only consumed
+    one batch at a time. Returns the number of users imported, created and failed.
+    """
+    imported_count = 0
+    created_count = 0
+    error_count = 0
+    done = 0
+    start_time = time.monotonic()
+
+    colleges_cache = load_colleges_by_hash()
+
+    for batch in iter_batches(users, batch_size):
+        create_missing_colleges(batch, colleges_cache)
+        counts = import_batch_or_users(batch, colleges_cache, hash_passwords, sync)
+        imported_count += counts[0]
+        created_count += counts[1]
+        error_count += counts[2]
+
+        elapsed = time.monotonic() - start_time
+        done += len(batch)
+        print(f"Processed {done} users ({done / elapsed:.0f} users/s)")
+
+    return imported_count, created_count, error_count
+
+
+def count_rows(batch):
+    """Count the users, decisions and test scores in a batch."""
+    return sum(
+        1 + len(user_info.get('decisions', [])) + len(user_info.get('test_scores', []))
+        for user_info in batch
+    )
+
+
+def import_batch_in_worker(batch, colleges_cache, hash_passwords, sync):
+    """
+    Import a batch of users in a worker process, which has its own database
+    connection. Returns the worker's PID, the time taken and the counts from
+    import_batch_or_users().
+    """
+    start_time = time.monotonic()
+    counts = import_batch_or_users(batch, colleges_cache, hash_passwords, sync)
+    return os.getpid(), time.monotonic() - start_time, counts
+
+
+def import_users_in_parallel(users, workers, batch_size=DEFAULT_BATCH_SIZE,
+                             hash_passwords=make_unusable_password_hashes, sync=False):
+    """
+    Import users from the export like import_users(), but with batches imported
+    concurrently by a pool of worker processes. Missing colleges are created
+    here, before a batch is handed to a worker, so workers never race to create
+    the same college. Returns the number of users imported, created and failed.
+    """
+    imported_count = 0
+    created_count = 0
+    error_count = 0
+    done = 0
+    start_time = time.monotonic()
+    # Users, rows and seconds spent importing by each worker
+    worker_stats = defaultdict(lambda: [0, 0, 0.0])
+
+    colleges_cache = load_colleges_by_hash()
+    pending = {}
+
+    def collect(futures):
+        nonlocal imported_count, created_count, error_count, done
+        for future in futures:
+            batch_users, batch_rows = pending.pop(future)
+            pid, elapsed, counts = future.result()
+            imported_count += counts[0]
+            created_count += counts[1]
+            error_count += counts[2]
+
+            stats = worker_stats[pid]
+            stats[0] += batch_users
+            stats[1] += batch_rows
+            stats[2] += elapsed
+
+            done += batch_users
+            print(f"Processed {done} users ({done / (time.monotonic() - start_time):.0f} users/s)")
+
+    # Workers are spawned rather than forked, so that none of them shares this
+    # process's database connection
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        for batch in iter_batches(users, batch_size):
+            create_missing_colleges(batch, colleges_cache)
+            batch_colleges = {
+                decision_info['college_hash']: colleges_cache[decision_info['college_hash']]
+                for user_info in batch for decision_info in user_info.get('decisions', [])
+            }
+            future = pool.submit(import_batch_in_worker, batch, batch_colleges, hash_passwords, sync)
+            pending[future] = (len(batch), count_rows(batch))
+
+            # Only read ahead of the workers by a few batches
+            if len(pending) >= workers * 2:
+                collect(wait(pending, return_when=FIRST_COMPLETED).done)
+
+        collect(list(pending))
+
+    for pid, (worker_users, worker_rows, elapsed) in sorted(worker_stats.items()):
+        print(
+            f"  Worker {pid}: {worker_users} users, {worker_rows} rows in {elapsed:.1f}s "
+            f"({worker_rows / max(elapsed, 1e-9):.0f} rows/s)"
+        )
+
+    return imported_count, created_count, error_count
+
+
+def iter_users(json_file):
+    """
+    Iterate over the users in an export, parsing it incrementally so that only
+    the users being imported are in memory. NDJSON exports (.ndjson or .jsonl)
+    and gzipped exports (.gz) are supported as well as JSON.
+    """
+    opener = gzip.open if json_file.endswith('.gz') else open
+    with opener(json_file, 'rt', encoding='utf-8') as f:
+        if json_file.removesuffix('.gz').endswith(('.ndjson', '.jsonl')):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            for _, user_info in iter_json_object(f):
+                yield user_info
+
+
+def skip_deleted_users(users, deleted_usernames):
+    """
+    Pass on the users in an export, leaving out the deleted users listed by
+    export_users.py --since, whose usernames are added to deleted_usernames.
+    """
+    for user_info in users:
+        if user_info.get('deleted'):
+            deleted_usernames.append(user_info['username'])
+        else:
+            yield user_info
+
+
+def import_users_from_json(json_file='users_export.json', batch_size=DEFAULT_BATCH_SIZE,
+                           random_passwords=False, processes=None, sync=False, workers=1):
+    """Import users from JSON file into the database."""
+
+    if not os.path.exists(json_file):
+        print(f"Error: {json_file} not found!")
+        return
+
+    start_time = time.monotonic()
+
+    print(f"Importing users from {json_file}")
+
+    if workers > 1 and connection.vendor == 'sqlite':
+        print("SQLite only allows one writer at a time, so importing in one process")
+        workers = 1
+
+    deleted_usernames = []
+    users = skip_deleted_users(iter_users(json_file), deleted_usernames)
+    if workers > 1:
+        print(f"Importing with {workers} worker processes")
+        # Each worker hashes the random passwords of its own batches
+        hash_passwords = make_random_password_hashes if random_passwords else make_unusable_password_hashes
+        imported_count, created_count, error_count = import_users_in_parallel(
+            users, workers, batch_size, hash_passwords, sync
+        )
+    elif random_passwords:
+        with RandomPasswordHasher(processes) as hasher:
+            print(f"Hashing random passwords with {hasher.processes} processes")
+            imported_count, created_count, error_count = import_users(users, batch_size, hasher, sync)
+    else:
+        imported_count, created_count, error_count = import_users(users, batch_size, sync=sync)
+
+    deleted_count = 0
+    if deleted_usernames and sync:
+        _, deleted = User.objects.filter(username__in=deleted_usernames).delete()
+        deleted_count = deleted.get(User._meta.label, 0)
+    elif deleted_usernames:
+        print(f"Skipped {len(deleted_usernames)} deleted users (use --sync to delete them)")
+
+    # Bulk queries do not send the signals that keep these up to date
+    print("Rebuilding college statistics and search index...")
+    rebuild_college_stats()
+    get_search_backend().rebuild()
+
+    elapsed = time.monotonic() - start_time
+    total_count = imported_count + error_count
     print(f"\nImport Summary:")
-    print(f"  Processed: {imported_count}")
+    print(f"  Processed: {imported_count} ({created_count} created, {imported_count - created_count} updated)")
+    print(f"  Deleted: {deleted_count}")
     print(f"  Errors: {error_count}")
-    print(f"  Total in file: {len(user_data)}")
+    print(f"  Total in file: {total_count}")
+    print(f"  Time: {elapsed:.1f}s ({total_count / max(elapsed, 1e-9):.0f} users/s)")
 
 
 def main():
     """Main function to import user data from JSON file."""
+    parser = argparse.ArgumentParser(description='Import users from a JSON export.')
+    parser.add_argument('json_file', nargs='?', default='users_export.json')
+    parser.add_argument(
+        '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+        help=f'Number of users to import per transaction (default: {DEFAULT_BATCH_SIZE})'
+    )
+    parser.add_argument(
+        '--random-passwords', action='store_true',
+        help='Give new users a random password instead of an unusable one'
+    )
+    parser.add_argument(
+        '--processes', type=int, default=None,
+        help='Number of processes hashing random passwords (default: one per CPU)'
+    )
+    parser.add_argument(
+        '--sync', action='store_true',
+        help="Also delete decisions and test scores of imported users that are not in the export, "
+             "and users the export lists as deleted"
+    )
+    parser.add_argument(
+        '--workers', type=int, default=1,
+        help='Number of processes importing batches concurrently, on PostgreSQL (default: 1)'
+    )
+    args = parser.parse_args()
+
     try:
-        json_file = 'users_export.json'
-        if len(sys.argv) > 1:
-            json_file = sys.argv[1]
-        
-        import_users_from_json(json_file)
-        
+        import_users_from_json(
+            args.json_file, batch_size=args.batch_size,
+            random_passwords=args.random_passwords, processes=args.processes,
+            sync=args.sync, workers=args.workers
+        )
+
     except Exception as e:
         print(f"Error during import: {e}")
         sys.exit(1)
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
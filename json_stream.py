@@ -0,0 +1,104 @@
+"""
+Incremental parsing of large JSON exports.
+
+iter_json_object() walks a top-level JSON object key by key, reading the file a
+chunk at a time, so only one value (e.g. one user) has to be in memory at once
+rather than the whole document.
+"""
+
+import json
+
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+_NUMBER_CHARS = '0123456789.eE+-'
+
+
+class _Reader:
+    """A buffer over a text file, refilled a chunk at a time as it is consumed."""
+
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """Read another chunk into the buffer, dropping what has been consumed."""
+        if self.eof:
+            return False
+        # Read at least as much as is buffered, so a value much larger than a
+        # chunk is not parsed again once per chunk
+        chunk = self.f.read(max(self.chunk_size, len(self.buffer) - self.pos))
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        if not chunk:
+            self.eof = True
+        return bool(chunk)
+
+    def next_char(self):
+        """Skip whitespace, then consume and return the next character ('' at the end)."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                self.pos += 1
+                return self.buffer[self.pos - 1]
+            if not self.fill():
+                return ''
+
+    def value(self):
+        """Skip whitespace, then consume and return the next JSON value."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+            # A number cut off by the end of the buffer parses as a shorter
+            # number, so it is only complete if followed by something else
+            cut_off = end == len(self.buffer) or (
+                isinstance(value, (int, float)) and self.buffer[end] in _NUMBER_CHARS
+            )
+            if cut_off and self.fill():
+                continue
+            self.pos = end
+            return value
+
+
+def _expect(reader, expected):
+    char = reader.next_char()
+    if not char or char not in expected:
+        raise ValueError(f'Expected one of {expected!r} in JSON object, found {char!r}')
+    return char
+
+
+def iter_json_object(f, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield the (key, value) pairs of the JSON object in the text file f, in order."""
+    reader = _Reader(f, chunk_size)
+    _expect(reader, '{')
+
+    char = reader.next_char()
+    if char != '}':
+        if char:
+            reader.pos -= 1
+
+        while True:
+            key = reader.value()
+            if not isinstance(key, str):
+                raise ValueError(f'Expected a string key in JSON object, found {key!r}')
+            _expect(reader, ':')
+            yield key, reader.value()
+
+            if _expect(reader, ',}') == '}':
+                break
+
+    # As json.load, nothing but whitespace may follow the object
+    char = reader.next_char()
+    if char:
+        raise ValueError(f'Expected the end of the file after the JSON object, found {char!r}')
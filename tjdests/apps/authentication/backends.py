@@ -1,24 +1,37 @@
 from django.contrib.auth.backends import ModelBackend
-from django.contrib.auth.hashers import check_password
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.exceptions import PermissionDenied
+from django.db.models import F
 from django.utils import timezone
 
-from .models import User
+from .models import PasswordHash, User
 
 
 class AdditionalHashBackend(ModelBackend):
     """
     Authentication backend that checks additional password hashes
     when use_additional_hashes is enabled for a user.
+
+    The user and their additional hashes are loaded in one query. If the
+    user exists but the password does not match, PermissionDenied stops the
+    backends after this one (i.e. ModelBackend) from checking the same
+    password against the same hash again.
     """
 
     def authenticate(self, request, username=None, password=None, **kwargs):
         if username is None or password is None:
             return None
 
-        try:
-            user = User.objects.get(username=username)
-        except User.DoesNotExist:
+        # One row per additional hash (or a single row if there are none)
+        rows = list(
+            User.objects.filter(username=username).annotate(
+                additional_hash_id=F("additional_hashes__id"),
+                additional_hash=F("additional_hashes__password_hash"),
+            )
+        )
+        if not rows:
             return None
+        user = rows[0]
 
         # First try the standard password authentication
         if user.check_password(password):
@@ -26,18 +39,43 @@ class AdditionalHashBackend(ModelBackend):
 
         # If standard auth fails and additional hashes are enabled, check those
         if user.use_additional_hashes:
-            additional_hashes = user.additional_hashes.all()
-
-            for password_hash_obj in additional_hashes:
-                if check_password(password, password_hash_obj.password_hash):
-                    # Update last_used timestamp
-                    password_hash_obj.last_used = timezone.now()
-                    password_hash_obj.save(update_fields=["last_used"])
+            checked = {user.password}
+            for row in rows:
+                if row.additional_hash is None or row.additional_hash in checked:
+                    continue
+                checked.add(row.additional_hash)
 
+                password_hash_obj = PasswordHash(
+                    id=row.additional_hash_id,
+                    user=user,
+                    password_hash=row.additional_hash,
+                )
+                if self._check_additional_hash(password, password_hash_obj):
                     # Set session flag to indicate password reset is needed
                     if request:
                         request.session["needs_password_reset"] = True
 
                     return user if self.user_can_authenticate(user) else None
 
-        return None
+        # ModelBackend would only check the same password again
+        raise PermissionDenied
+
+    @staticmethod
+    def _check_additional_hash(password, password_hash_obj):
+        """
+        Check a password against an additional hash. If it matches, the hash
+        is upgraded to the current hasher if needed and last_used is updated.
+        """
+        update_fields = ["last_used"]
+
+        def setter(raw_password):
+            password_hash_obj.password_hash = make_password(raw_password)
+            update_fields.append("password_hash")
+
+        if not check_password(password, password_hash_obj.password_hash, setter):
+            return False
+
+        # Update last_used timestamp
+        password_hash_obj.last_used = timezone.now()
+        password_hash_obj.save(update_fields=update_fields)
+        return True
@@ -0,0 +1,125 @@
+import base64
+from typing import Dict, Optional, Type
+
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, PBKDF2SHA1PasswordHasher, mask_hash
+from django.utils.crypto import constant_time_compare, pbkdf2
+from django.utils.translation import gettext_noop as _
+
+
+class PBKDF2WrappedPasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2 (SHA256) over the hash of an older PBKDF2 hasher.
+
+    A hash with fewer iterations than the current default can be wrapped
+    without knowing the password, for which the outer PBKDF2 runs the
+    missing iterations so that the two add up to the current default. On
+    the next successful login the password is rehashed normally.
+
+    Encoded as <algorithm>$<iterations>$<salt>$<inner iterations>$<inner salt>$<hash>.
+    """
+
+    algorithm = "wrapped_pbkdf2_sha256"
+    inner_hasher_class: Type[PBKDF2PasswordHasher] = PBKDF2PasswordHasher
+
+    def wrap(self, inner_encoded: str, salt: Optional[str] = None) -> str:
+        """Wrap an encoded hash of the inner hasher."""
+        inner = self.inner_hasher_class().decode(inner_encoded)
+        salt = salt or self.salt()
+        iterations = max(1, self.iterations - inner["iterations"])
+        return "$".join(
+            [
+                self.algorithm,
+                str(iterations),
+                salt,
+                str(inner["iterations"]),
+                inner["salt"],
+                self._outer_hash(inner["hash"], salt, iterations),
+            ]
+        )
+
+    def _outer_hash(self, inner_hash: str, salt: str, iterations: int) -> str:
+        hash_ = pbkdf2(inner_hash, salt, iterations, digest=self.digest)
+        return base64.b64encode(hash_).decode("ascii").strip()
+
+    def encode(self, password, salt, iterations=None):
+        return self.wrap(self.inner_hasher_class().encode(password, salt), salt)
+
+    def decode(self, encoded):
+        algorithm, iterations, salt, inner_iterations, inner_salt, hash_ = (
+            encoded.split("$", 5)
+        )
+        assert algorithm == self.algorithm
+        return {
+            "algorithm": algorithm,
+            "hash": hash_,
+            "iterations": int(iterations),
+            "salt": salt,
+            "inner_iterations": int(inner_iterations),
+            "inner_salt": inner_salt,
+        }
+
+    def verify(self, password, encoded):
+        decoded = self.decode(encoded)
+        inner = self.inner_hasher_class().decode(
+            self.inner_hasher_class().encode(
+                password, decoded["inner_salt"], decoded["inner_iterations"]
+            )
+        )
+        hash_ = self._outer_hash(inner["hash"], decoded["salt"], decoded["iterations"])
+        return constant_time_compare(decoded["hash"], hash_)
+
+    def safe_summary(self, encoded):
+        decoded = self.decode(encoded)
+        return {
+            _("algorithm"): decoded["algorithm"],
+            _("iterations"): decoded["iterations"],
+            _("salt"): mask_hash(decoded["salt"]),
+            _("inner iterations"): decoded["inner_iterations"],
+            _("inner salt"): mask_hash(decoded["inner_salt"]),
+            _("hash"): mask_hash(decoded["hash"]),
+        }
+
+    def must_update(self, encoded):
+        # Always rehashed with the default hasher once the password is known
+        return True
+
+    def harden_runtime(self, password, encoded):
+        pass
+
+
+class PBKDF2WrappedSHA1PasswordHasher(PBKDF2WrappedPasswordHasher):
+    """PBKDF2 (SHA256) over a PBKDF2 (SHA1) hash."""
+
+    algorithm = "wrapped_pbkdf2_sha1"
+    inner_hasher_class = PBKDF2SHA1PasswordHasher
+
+
+# Wrapped hashers by the algorithm of the hashes they wrap
+WRAPPED_HASHERS: Dict[str, Type[PBKDF2WrappedPasswordHasher]] = {
+    hasher.inner_hasher_class.algorithm: hasher
+    for hasher in [PBKDF2WrappedPasswordHasher, PBKDF2WrappedSHA1PasswordHasher]
+}
+
+
+def needs_wrapping(encoded: str) -> bool:
+    """Whether a hash is a PBKDF2 hash with fewer than the current iterations."""
+    hasher_class = WRAPPED_HASHERS.get(encoded.split("$", 1)[0])
+    if hasher_class is None:
+        return False
+
+    try:
+        inner = hasher_class.inner_hasher_class().decode(encoded)
+    except (AssertionError, ValueError):
+        return False
+    return inner["iterations"] < hasher_class.iterations
+
+
+def wrap_password_hash(encoded: str) -> str:
+    """
+    Wrap a hash in the current number of PBKDF2 iterations if it needs it,
+    otherwise return it unchanged. Runs in a worker process with
+    migrate_password_hashes --wrap.
+    """
+    if not needs_wrapping(encoded):
+        return encoded
+    return WRAPPED_HASHERS[encoded.split("$", 1)[0]]().wrap(encoded)
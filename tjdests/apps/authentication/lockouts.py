@@ -0,0 +1,277 @@
+import math
+import time
+from logging import getLogger
+from typing import List, Optional
+
+from axes.conf import settings as axes_settings
+from axes.handlers.cache import AxesCacheHandler
+from axes.helpers import (
+    get_cache_timeout,
+    get_client_cache_keys,
+    get_client_parameters,
+    get_client_str,
+    get_client_username,
+    get_cool_off,
+    get_credentials,
+    get_failure_limit,
+    get_lockout_parameters,
+    get_query_str,
+    make_cache_key_list,
+)
+from axes.models import AccessAttempt
+from axes.signals import user_locked_out
+
+from django.conf import settings
+from django.db.models import Q
+
+log = getLogger(__name__)
+
+
+class SlidingWindowCacheHandler(AxesCacheHandler):
+    """
+    Axes handler that counts failed logins in the cache instead of the database.
+
+    Failures are counted per client (see AXES_LOCKOUT_PARAMETERS) over a
+    sliding window of LOGIN_FAILURE_WINDOW, estimated from the counts of the
+    current and previous fixed windows, each of which is one cache key.
+
+    Nothing is written to the database until a client is locked out. The
+    lockout is then saved as an AccessAttempt, so that it is listed in the
+    admin and lasts (for AXES_COOLOFF_TIME, or until reset) even if the cache
+    is cleared: if the cache has no failures for a client, the database is
+    checked for a saved lockout, which is then cached again.
+    """
+
+    @staticmethod
+    def _window() -> int:
+        return int(settings.LOGIN_FAILURE_WINDOW.total_seconds())
+
+    def _bucket_keys(self, cache_key: str, now: float) -> List[str]:
+        """The keys of the current and previous window's counts."""
+        bucket = int(now // self._window())
+        return [f"{cache_key}:{bucket}", f"{cache_key}:{bucket - 1}"]
+
+    def _count(self, cache_key: str, now: float) -> int:
+        current_key, previous_key = self._bucket_keys(cache_key, now)
+        counts = self.cache.get_many([current_key, previous_key])
+
+        # The part of the previous window that is still inside the sliding window
+        previous_weight = 1 - (now % self._window()) / self._window()
+        return math.ceil(
+            counts.get(current_key, 0) + counts.get(previous_key, 0) * previous_weight
+        )
+
+    def _is_lockout_saved(self, request, credentials: Optional[dict]) -> bool:
+        """Whether a lockout of this client is saved in the database."""
+        username = get_client_username(request, credentials)
+        client_filter = Q()
+        for filter_kwargs in get_client_parameters(
+            username,
+            request.axes_ip_address,
+            request.axes_user_agent,
+            request,
+            credentials,
+        ):
+            client_filter |= Q(**filter_kwargs)
+
+        attempts = AccessAttempt.objects.filter(
+            client_filter,
+            failures_since_start__gte=get_failure_limit(request, credentials),
+        )
+        cool_off = get_cool_off()
+        if cool_off is not None:
+            attempts = attempts.filter(
+                attempt_time__gte=request.axes_attempt_time - cool_off
+            )
+        return attempts.exists()
+
+    def get_failures(self, request, credentials: Optional[dict] = None) -> int:
+        cache_keys = get_client_cache_keys(request, credentials)
+        failure_limit = get_failure_limit(request, credentials)
+
+        if self._is_lockout_cached(cache_keys):
+            return failure_limit
+
+        now = time.time()
+        failures = max(self._count(cache_key, now) for cache_key in cache_keys)
+        if not failures and self._is_lockout_saved(request, credentials):
+            self._cache_lockout(cache_keys)
+            return failure_limit
+        return failures
+
+    def _is_lockout_cached(self, cache_keys: List[str]) -> bool:
+        return any(
+            self.cache.get_many([f"{cache_key}:locked" for cache_key in cache_keys])
+        )
+
+    def _cache_lockout(self, cache_keys: List[str]) -> None:
+        # The failures are cleared, since they would otherwise still add up to
+        # the limit once the lockout expires, and so lock the client out again
+        # for up to LOGIN_FAILURE_WINDOW whatever AXES_COOLOFF_TIME is
+        self._delete_keys(cache_keys)
+        self.cache.set_many(
+            {f"{cache_key}:locked": True for cache_key in cache_keys},
+            timeout=get_cache_timeout(),
+        )
+
+    def user_login_failed(self, sender, credentials: dict, request=None, **kwargs):
+        """
+        Count a failed login in the cache, and save a lockout if that reaches
+        the failure limit.
+
+        :raises AxesSignalPermissionDenied: if user should be locked out.
+        """
+        if request is None:
+            return
+
+        username = get_client_username(request, credentials)
+        lockout_parameters = get_lockout_parameters(request, credentials)
+        if lockout_parameters == ["username"] and username is None:
+            return
+
+        # If axes denied access, don't count the attempt (as AxesCacheHandler)
+        if (
+            not axes_settings.AXES_RESET_COOL_OFF_ON_FAILURE_DURING_LOCKOUT
+            and request.axes_locked_out
+        ):
+            request.axes_credentials = credentials
+            user_locked_out.send(
+                "axes",
+                request=request,
+                username=username,
+                ip_address=request.axes_ip_address,
+            )
+            return
+
+        if self.is_whitelisted(request, credentials):
+            return
+
+        now = time.time()
+        cache_keys = get_client_cache_keys(request, credentials)
+        failure_limit = get_failure_limit(request, credentials)
+        # Checked by AxesStandaloneBackend before authenticating, so a saved
+        # lockout is cached again by now
+        locked_out = self._is_lockout_cached(cache_keys)
+        for cache_key in cache_keys:
+            current_key = self._bucket_keys(cache_key, now)[0]
+            if not self.cache.add(current_key, 1, timeout=2 * self._window()):
+                self.cache.incr(current_key)
+
+        failures = max(self._count(cache_key, now) for cache_key in cache_keys)
+        request.axes_failures_since_start = failures
+
+        if axes_settings.AXES_LOCK_OUT_AT_FAILURE and (
+            locked_out or failures >= failure_limit
+        ):
+            if locked_out:
+                # Restart the cool off, without writing to the database again
+                self._cache_lockout(cache_keys)
+            else:
+                self._save_lockout(request, username, failures, cache_keys)
+
+            request.axes_locked_out = True
+            request.axes_credentials = credentials
+            user_locked_out.send(
+                "axes",
+                request=request,
+                username=username,
+                ip_address=request.axes_ip_address,
+            )
+
+    def _save_lockout(
+        self, request, username: Optional[str], failures: int, cache_keys: List[str]
+    ) -> None:
+        self._cache_lockout(cache_keys)
+        AccessAttempt.objects.update_or_create(
+            username=username,
+            ip_address=request.axes_ip_address,
+            user_agent=request.axes_user_agent,
+            defaults={
+                "get_data": get_query_str(request.GET).replace("\0", "0x00"),
+                "post_data": get_query_str(request.POST).replace("\0", "0x00"),
+                "http_accept": request.axes_http_accept,
+                "path_info": request.axes_path_info,
+                "failures_since_start": failures,
+                "attempt_time": request.axes_attempt_time,
+            },
+        )
+
+        client_str = get_client_str(
+            username,
+            request.axes_ip_address,
+            request.axes_user_agent,
+            request.axes_path_info,
+            request,
+        )
+        log.warning("AXES: Locking out %s after repeated login failures.", client_str)
+
+    def _delete_keys(self, cache_keys: List[str]) -> None:
+        now = time.time()
+        keys = []
+        for cache_key in cache_keys:
+            keys += self._bucket_keys(cache_key, now) + [f"{cache_key}:locked"]
+        self.cache.delete_many(keys)
+
+    def reset_attempts(
+        self,
+        *,
+        ip_address: Optional[str] = None,
+        username: Optional[str] = None,
+        ip_or_username: bool = False,
+    ) -> int:
+        """
+        Reset the saved lockouts matching the given IP address and username,
+        and the failures and cached lockouts of their clients.
+
+        Failures below the limit are only counted in the cache, by the lockout
+        parameters, so they are only reset for the parameters given exactly,
+        e.g. with AXES_LOCKOUT_PARAMETERS = ["ip_address"], by the IP address
+        but not by the username.
+        """
+        if ip_address is None and username is None:
+            raise NotImplementedError("Cannot clear all entries from cache")
+
+        attempts = AccessAttempt.objects.all()
+        if ip_or_username:
+            attempts = attempts.filter(Q(ip_address=ip_address) | Q(username=username))
+        else:
+            if ip_address is not None:
+                attempts = attempts.filter(ip_address=ip_address)
+            if username is not None:
+                attempts = attempts.filter(username=username)
+
+        # The keys of saved lockouts are those of the clients they were saved
+        # for, as in post_delete_access_attempt
+        cache_keys = []
+        for attempt in attempts:
+            cache_keys += get_client_cache_keys(attempt)
+
+        client_parameters = get_client_parameters(
+            username, ip_address, None, AccessAttempt(username=username)
+        )
+        cache_keys += make_cache_key_list(
+            [
+                filter_kwargs
+                for filter_kwargs in client_parameters
+                if None not in filter_kwargs.values()
+            ]
+        )
+
+        self._delete_keys(cache_keys)
+        count, _ = attempts.delete()
+
+        log.info("AXES: Reset %d access attempts from database.", count)
+        return count
+
+    def user_logged_in(self, sender, request, user, **kwargs):
+        if axes_settings.AXES_RESET_ON_SUCCESS:
+            self._delete_keys(
+                get_client_cache_keys(request, get_credentials(user.get_username()))
+            )
+
+    def post_save_access_attempt(self, instance, **kwargs):
+        pass
+
+    def post_delete_access_attempt(self, instance, **kwargs):
+        # e.g. a lockout deleted in the admin
+        self._delete_keys(get_client_cache_keys(instance))
@@ -0,0 +1,90 @@
+import argparse
+import time
+
+from axes.handlers.proxy import AxesProxyHandler
+
+from django.contrib.auth import authenticate
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ...models import User
+
+HANDLERS = [
+    ("database", "axes.handlers.database.AxesDatabaseHandler"),
+    ("cache", "axes.handlers.cache.AxesCacheHandler"),
+    (
+        "sliding window",
+        "tjdests.apps.authentication.lockouts.SlidingWindowCacheHandler",
+    ),
+]
+
+WRITE_STATEMENTS = ("INSERT", "UPDATE", "DELETE")
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks failed login tracking by each axes handler, as under a "
+        "password guessing attack from several addresses. The users and any "
+        "access attempts are created inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser: argparse.ArgumentParser):
+        parser.add_argument("--attackers", type=int, default=50)
+        parser.add_argument("--attempts-per-attacker", type=int, default=20)
+        parser.add_argument("--failure-limit", type=int, default=10)
+
+    def handle(self, *args, **options):
+        # Hash with MD5 so that the timings are of the attempt tracking
+        with override_settings(
+            AXES_ENABLED=True,
+            AXES_FAILURE_LIMIT=options["failure_limit"],
+            PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+        ):
+            for name, handler in HANDLERS:
+                with override_settings(AXES_HANDLER=handler):
+                    self.benchmark(name, options)
+
+        AxesProxyHandler.get_implementation(force=True)
+
+    def benchmark(self, name: str, options: dict) -> None:
+        implementation = AxesProxyHandler.get_implementation(force=True)
+        factory = RequestFactory()
+        path = reverse("authentication:login")
+        ip_addresses = [
+            f"198.18.{i // 256}.{i % 256}" for i in range(options["attackers"])
+        ]
+
+        with transaction.atomic():
+            User.objects.bulk_create(
+                User(username=f"benchmark{i}", password="!")
+                for i in range(options["attackers"])
+            )
+
+            attempts = 0
+            start = time.perf_counter()
+            with CaptureQueriesContext(connection) as queries:
+                for _ in range(options["attempts_per_attacker"]):
+                    for i, ip_address in enumerate(ip_addresses):
+                        request = factory.post(path, REMOTE_ADDR=ip_address)
+                        authenticate(
+                            request, username=f"benchmark{i}", password="wrong"
+                        )
+                        attempts += 1
+            elapsed = time.perf_counter() - start
+
+            writes = sum(
+                query["sql"].lstrip().upper().startswith(WRITE_STATEMENTS)
+                for query in queries
+            )
+            self.stdout.write(
+                f"{name}: {attempts / elapsed:.0f} attempts/s, "
+                f"{len(queries) / attempts:.1f} queries and "
+                f"{writes / attempts:.2f} writes per attempt"
+            )
+
+            for ip_address in ip_addresses:
+                implementation.reset_attempts(ip_address=ip_address)
+            transaction.set_rollback(True)
@@ -0,0 +1,63 @@
+import argparse
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ...models import User
+
+ENGINES = ["db", "cached_db", "cache", "signed_cookies"]
+
+PAGES = ["authentication:index", "destinations:students", "profile:index"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks logged in page views with each session engine, reporting "
+        "the database queries and latency per request. The user is created "
+        "inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser: argparse.ArgumentParser):
+        parser.add_argument("--requests", type=int, default=200)
+
+    def handle(self, *args, **options):
+        with override_settings(ALLOWED_HOSTS=["testserver"]):
+            for engine in ENGINES:
+                with override_settings(
+                    SESSION_ENGINE=f"django.contrib.sessions.backends.{engine}"
+                ):
+                    self.benchmark(engine, options["requests"])
+
+    def benchmark(self, engine: str, requests: int) -> None:
+        with transaction.atomic():
+            user = User.objects.create(
+                username="benchmark",
+                accepted_terms=True,
+                is_student=True,
+            )
+            client = Client()
+            client.force_login(user)
+
+            urls = [reverse(page) for page in PAGES]
+            for url in urls:
+                client.get(url)
+
+            start = time.perf_counter()
+            with CaptureQueriesContext(connection) as queries:
+                for i in range(requests):
+                    client.get(urls[i % len(urls)])
+            elapsed = time.perf_counter() - start
+
+            session_queries = sum("django_session" in query["sql"] for query in queries)
+            self.stdout.write(
+                f"{engine}: {elapsed / requests * 1000:.1f}ms, "
+                f"{len(queries) / requests:.1f} queries "
+                f"({session_queries / requests:.1f} for the session) per request"
+            )
+
+            client.logout()
+            transaction.set_rollback(True)
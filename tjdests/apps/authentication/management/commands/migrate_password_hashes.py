@@ -0,0 +1,179 @@
+import argparse
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, TypeVar
+
+from django.contrib.auth.hashers import identify_hasher, is_password_usable
+from django.core.management.base import BaseCommand
+from django.db.models import Case, F, Q, Value, When
+
+from ...hashers import needs_wrapping, wrap_password_hash
+from ...models import PasswordHash, User
+
+T = TypeVar("T")
+
+
+def describe_hash(encoded: str) -> str:
+    """Describe the hasher of an encoded password, e.g. "pbkdf2_sha256 (260000 iterations)"."""
+    if not encoded or not is_password_usable(encoded):
+        return "unusable"
+
+    try:
+        hasher = identify_hasher(encoded)
+        iterations = hasher.decode(encoded).get("iterations")
+    except (AssertionError, ValueError):
+        return "unknown"
+
+    if iterations:
+        return f"{hasher.algorithm} ({iterations} iterations)"
+    return hasher.algorithm
+
+
+class Command(BaseCommand):
+    help = (
+        "Reports the hashers used by passwords and additional password hashes, "
+        "and optionally prunes superseded additional hashes and wraps legacy "
+        "PBKDF2 hashes in the current number of iterations."
+    )
+
+    def add_arguments(self, parser: argparse.ArgumentParser):
+        parser.add_argument(
+            "--prune",
+            action="store_true",
+            help="Delete additional hashes of users who have since set a password, "
+            "and duplicates of a user's other hashes or password.",
+        )
+        parser.add_argument(
+            "--wrap",
+            action="store_true",
+            help="Wrap PBKDF2 hashes with fewer than the current iterations.",
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=None,
+            help="Number of processes wrapping hashes (default: one per CPU).",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        self.report()
+
+        if options["prune"]:
+            self.prune(options["batch_size"])
+        if options["wrap"]:
+            self.wrap(options["processes"], options["batch_size"])
+        if options["prune"] or options["wrap"]:
+            self.report()
+
+    def report(self) -> None:
+        for label, hashes in [
+            ("User passwords", User.objects.values_list("password", flat=True)),
+            (
+                "Additional hashes",
+                PasswordHash.objects.values_list("password_hash", flat=True),
+            ),
+        ]:
+            counts = Counter(describe_hash(encoded) for encoded in hashes.iterator())
+            self.stdout.write(f"{label}: {sum(counts.values())}")
+            for description, count in counts.most_common():
+                self.stdout.write(f"  {description}: {count}")
+
+    def prune(self, batch_size: int) -> None:
+        # As when a user sets a new password in the accept TOS or force
+        # password reset views
+        superseded, _ = PasswordHash.objects.filter(
+            user__use_additional_hashes=False
+        ).delete()
+
+        duplicate_ids = []
+        last_user_id = None
+        seen = set()
+        for hash_id, user_id, encoded, password in (
+            PasswordHash.objects.order_by("user_id", "-created_at", "-id")
+            .values_list("id", "user_id", "password_hash", "user__password")
+            .iterator()
+        ):
+            if user_id != last_user_id:
+                last_user_id = user_id
+                seen = {password}
+            if encoded in seen:
+                duplicate_ids.append(hash_id)
+            seen.add(encoded)
+
+        for batch in self._batches(duplicate_ids, batch_size):
+            PasswordHash.objects.filter(id__in=batch).delete()
+
+        self.stdout.write(
+            f"Pruned {superseded} superseded and {len(duplicate_ids)} duplicate "
+            "additional hashes.",
+            style_func=self.style.SUCCESS,
+        )
+
+    def wrap(self, processes: int, batch_size: int) -> None:
+        hashes = [
+            row
+            for row in PasswordHash.objects.values_list("id", "password_hash")
+            if needs_wrapping(row[1])
+        ]
+        passwords = [
+            row
+            for row in User.objects.values_list("id", "password")
+            if needs_wrapping(row[1])
+        ]
+        total = len(hashes) + len(passwords)
+        if not total:
+            self.stdout.write("No hashes need wrapping.")
+            return
+
+        processes = processes or os.cpu_count() or 1
+        with ProcessPoolExecutor(processes) as pool:
+            self.stdout.write(f"Wrapping {total} hashes with {processes} processes")
+
+            done = 0
+            skipped = 0
+            start_time = time.monotonic()
+            for model, field, rows in [
+                (PasswordHash, "password_hash", hashes),
+                (User, "password", passwords),
+            ]:
+                for batch in self._batches(rows, batch_size):
+                    wrapped = pool.map(
+                        wrap_password_hash,
+                        [encoded for _, encoded in batch],
+                        chunksize=max(1, len(batch) // (processes * 4)),
+                    )
+                    # Only hashes that are unchanged since they were read are
+                    # written, so that e.g. a password set in the meantime is
+                    # not replaced by a wrapped copy of the old one
+                    unchanged = Q()
+                    whens = []
+                    for (row_id, old_encoded), encoded in zip(batch, wrapped):
+                        unchanged |= Q(id=row_id, **{field: old_encoded})
+                        whens.append(
+                            When(id=row_id, **{field: old_encoded}, then=Value(encoded))
+                        )
+                    updated = model.objects.filter(unchanged).update(
+                        **{field: Case(*whens, default=F(field))}
+                    )
+
+                    done += len(batch)
+                    skipped += len(batch) - updated
+                    elapsed = time.monotonic() - start_time
+                    self.stdout.write(
+                        f"Wrapped {done}/{total} hashes ({done / elapsed:.1f} hashes/s)"
+                    )
+
+        self.stdout.write(
+            f"Wrapped {total - skipped} hashes, skipped {skipped} changed since "
+            "they were read.",
+            style_func=self.style.SUCCESS,
+        )
+
+    @staticmethod
+    def _batches(rows: List[T], batch_size: int) -> Iterable[List[T]]:
+        for start in range(0, len(rows), batch_size):
+            end = start + batch_size
+            yield rows[start:end]
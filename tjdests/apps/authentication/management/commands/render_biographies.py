@@ -0,0 +1,46 @@
+import argparse
+
+from django.core.management.base import BaseCommand
+
+from ...models import User
+
+
+class Command(BaseCommand):
+    help = "Renders stored biography HTML for users whose copy is missing or stale."
+
+    def add_arguments(self, parser: argparse.ArgumentParser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Re-render every biography, even if the stored copy is current.",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch = []
+        rendered = 0
+
+        users = User.objects.only(
+            "id", "biography", "biography_html", "biography_html_hash"
+        ).order_by("id")
+        for user in users.iterator(chunk_size=options["batch_size"]):
+            if not options["force"] and not user.is_biography_html_stale():
+                continue
+
+            user.render_biography()
+            batch.append(user)
+
+            if len(batch) >= options["batch_size"]:
+                User.objects.bulk_update(
+                    batch, ["biography_html", "biography_html_hash"]
+                )
+                rendered += len(batch)
+                batch = []
+
+        if batch:
+            User.objects.bulk_update(batch, ["biography_html", "biography_html_hash"])
+            rendered += len(batch)
+
+        self.stdout.write(
+            f"Rendered {rendered} biographies.", style_func=self.style.SUCCESS
+        )
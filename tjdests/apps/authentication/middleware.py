@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.shortcuts import redirect
 from django.urls import reverse
 
@@ -6,25 +7,29 @@ class PasswordResetRequiredMiddleware:  # pylint: disable=too-few-public-methods
     """
     Middleware to redirect users who logged in with additional hashes
     to the password reset page.
+
+    Requests without a session cookie cannot have the flag set, so they are
+    passed through without loading the session or the user.
     """
 
     def __init__(self, get_response):
         self.get_response = get_response
 
+        # Allow access to the password reset page and logout
+        self.allowed_paths = {
+            reverse("authentication:force_password_reset"),
+            reverse("authentication:logout"),
+        }
+
     def __call__(self, request):
         # Check if user needs password reset and is authenticated
-        if request.user.is_authenticated and request.session.get(
-            "needs_password_reset", False
+        if (
+            settings.SESSION_COOKIE_NAME in request.COOKIES
+            and request.session.get("needs_password_reset", False)
+            and request.user.is_authenticated
+            and request.path_info not in self.allowed_paths
         ):
-
-            # Allow access to the password reset page and logout
-            allowed_paths = [
-                reverse("authentication:force_password_reset"),
-                reverse("authentication:logout"),
-            ]
-
-            if request.path not in allowed_paths:
-                return redirect("authentication:force_password_reset")
+            return redirect("authentication:force_password_reset")
 
         response = self.get_response(request)
         return response
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-15 07:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("authentication", "0019_alter_user_graduation_year"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="biography_html",
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="biography_html_hash",
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+    ]
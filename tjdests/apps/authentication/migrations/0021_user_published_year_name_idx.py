@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-15 07:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("authentication", "0020_user_biography_html"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(
+                condition=models.Q(("publish_data", True)),
+                fields=["graduation_year", "last_name", "preferred_name"],
+                name="user_published_year_name_idx",
+            ),
+        ),
+    ]
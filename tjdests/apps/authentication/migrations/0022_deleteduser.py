@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-15 09:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("authentication", "0021_user_published_year_name_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DeletedUser",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("username", models.CharField(max_length=150, unique=True)),
+                ("deleted_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -1,8 +1,11 @@
+import hashlib
+
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.utils import timezone
 
 from ..destinations.models import Decision
+from ..destinations.templatetags.markdown import convert_markdown
 
 
 class User(AbstractUser):
@@ -36,6 +39,11 @@ class User(AbstractUser):
     )
     biography = models.TextField(blank=True, max_length=1500)
 
+    # Rendered copy of the biography, along with a hash of the source it was
+    # rendered from so that stale copies can be detected.
+    biography_html = models.TextField(blank=True, editable=False)
+    biography_html_hash = models.CharField(max_length=64, blank=True, editable=False)
+
     attending_decision = models.ForeignKey(
         Decision,
         on_delete=models.SET_NULL,
@@ -57,6 +65,28 @@ class User(AbstractUser):
         "PasswordHash table.",
     )
 
+    def get_biography_hash(self) -> str:
+        return hashlib.sha256(self.biography.encode()).hexdigest()
+
+    def is_biography_html_stale(self) -> bool:
+        return self.biography_html_hash != self.get_biography_hash()
+
+    def render_biography(self) -> None:
+        """Render the biography and store it in biography_html. Does not save."""
+        self.biography_html = convert_markdown(self.biography)
+        self.biography_html_hash = self.get_biography_hash()
+
+    def get_biography_html(self) -> str:
+        """
+        Get the rendered biography, using the stored copy unless the biography
+        has changed since it was rendered.
+        """
+        if not self.biography:
+            return ""
+        if self.is_biography_html_stale():
+            return convert_markdown(self.biography)
+        return self.biography_html
+
     def get_preferred_name(self):
         return self.nickname if self.nickname and self.use_nickname else self.first_name
 
@@ -105,6 +135,18 @@ class User(AbstractUser):
     def __str__(self):
         return f"{self.preferred_name} {self.last_name}"
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Student destinations list: published seniors of a year, by name.
+            # This is a partial index so that the bare boolean publish_data
+            # condition can be matched on SQLite as well as PostgreSQL.
+            models.Index(
+                fields=["graduation_year", "last_name", "preferred_name"],
+                condition=models.Q(publish_data=True),
+                name="user_published_year_name_idx",
+            ),
+        ]
+
     def save(self, *args, **kwargs):
         self.preferred_name = self.get_preferred_name()
         super().save(*args, **kwargs)
@@ -127,3 +169,16 @@ class PasswordHash(models.Model):
 
     def __str__(self):
         return f"Hash for {self.user.username} (created: {self.created_at.strftime('%Y-%m-%d')})"
+
+
+class DeletedUser(models.Model):
+    """
+    A deleted user, so that export_users.py --since can pass the deletion on.
+    Recorded by the signal handlers in destinations/signals.py.
+    """
+
+    username = models.CharField(max_length=150, unique=True)
+    deleted_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.username} (deleted: {self.deleted_at.strftime('%Y-%m-%d')})"
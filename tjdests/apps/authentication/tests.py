@@ -1,8 +1,34 @@
-from django.contrib.auth.hashers import check_password
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from axes.models import AccessAttempt
+from axes.utils import reset
+
+from django.contrib.auth import authenticate
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import (
+    PBKDF2PasswordHasher,
+    PBKDF2SHA1PasswordHasher,
+    check_password,
+    make_password,
+)
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from ...test import TJDestsTestCase
-from .models import User
+from .lockouts import SlidingWindowCacheHandler
+from .middleware import PasswordResetRequiredMiddleware
+from .models import PasswordHash, User
 
 
 class AuthenticationTest(TJDestsTestCase):
@@ -143,3 +169,349 @@ class AuthenticationTest(TJDestsTestCase):
         # Loading the page now should 302
         response = self.client.get(reverse("authentication:tos"))
         self.assertEqual(302, response.status_code)
+
+    def test_render_biographies_command(self):
+        """Tests rendering and backfilling stored biography HTML."""
+        user = User.objects.create(username="2021awilliam", biography="**hello**")
+
+        # Nothing stored yet, so the biography is rendered live
+        self.assertTrue(user.is_biography_html_stale())
+        self.assertEqual("", user.biography_html)
+        self.assertIn("<strong>hello</strong>", user.get_biography_html())
+
+        call_command("render_biographies")
+        user.refresh_from_db()
+        self.assertFalse(user.is_biography_html_stale())
+        self.assertIn("<strong>hello</strong>", user.biography_html)
+
+        # Changing the biography without re-rendering falls back to live rendering
+        user.biography = "*bye*"
+        user.save()
+        self.assertTrue(user.is_biography_html_stale())
+        self.assertIn("<em>bye</em>", user.get_biography_html())
+        self.assertIn("<strong>hello</strong>", user.biography_html)
+
+    def test_additional_hash_backend(self):
+        """Tests logging in with additional (legacy) password hashes."""
+        user = User.objects.create(username="2021awilliam", use_additional_hashes=True)
+        user.set_password("primary")
+        user.save()
+        legacy_hash = PasswordHash.objects.create(
+            user=user, password_hash=make_password("legacy", hasher="pbkdf2_sha1")
+        )
+        PasswordHash.objects.create(user=user, password_hash=make_password("other"))
+
+        # The primary password is checked with one query for the user and hashes
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                user, authenticate(username="2021awilliam", password="primary")
+            )
+
+        # A wrong password is not checked again by ModelBackend
+        with patch.object(ModelBackend, "authenticate") as model_authenticate:
+            with self.assertNumQueries(1):
+                self.assertIsNone(
+                    authenticate(username="2021awilliam", password="wrong")
+                )
+        model_authenticate.assert_not_called()
+
+        # Unknown users still go through ModelBackend
+        self.assertIsNone(authenticate(username="nobody", password="primary"))
+
+        # A legacy hash logs in, is upgraded to the current hasher and
+        # requires a password reset
+        response = self.client.post(
+            reverse("authentication:login"),
+            data={"username": "2021awilliam", "password": "legacy"},
+        )
+        self.assertEqual(302, response.status_code)
+        self.assertTrue(self.client.session["needs_password_reset"])
+
+        legacy_hash.refresh_from_db()
+        self.assertIsNotNone(legacy_hash.last_used)
+        self.assertTrue(legacy_hash.password_hash.startswith("pbkdf2_sha256$"))
+        self.assertTrue(check_password("legacy", legacy_hash.password_hash))
+
+        # Without use_additional_hashes, they are ignored
+        user.use_additional_hashes = False
+        user.save()
+        self.assertIsNone(authenticate(username="2021awilliam", password="legacy"))
+
+    def test_migrate_password_hashes_command(self):
+        """Tests reporting, pruning and wrapping password hashes."""
+        with patch.object(PBKDF2PasswordHasher, "iterations", 1000):
+            user = User.objects.create(
+                username="2021awilliam", use_additional_hashes=True
+            )
+            user.set_password("primary")
+            user.save()
+            legacy_hash = PasswordHash.objects.create(
+                user=user,
+                password_hash=PBKDF2SHA1PasswordHasher().encode("legacy", "salt", 100),
+            )
+            # A duplicate of the password and of the other hash
+            PasswordHash.objects.create(user=user, password_hash=user.password)
+            PasswordHash.objects.create(
+                user=user, password_hash=legacy_hash.password_hash
+            )
+
+            # Superseded by a new password
+            other_user = User.objects.create(username="2021bwilliam")
+            PasswordHash.objects.create(
+                user=other_user, password_hash=make_password("old")
+            )
+
+            out = StringIO()
+            call_command("migrate_password_hashes", stdout=out)
+            self.assertIn("pbkdf2_sha1 (100 iterations): 2", out.getvalue())
+            self.assertIn("unusable: 1", out.getvalue())
+            self.assertEqual(4, PasswordHash.objects.count())
+
+            out = StringIO()
+            call_command(
+                "migrate_password_hashes",
+                "--prune",
+                "--wrap",
+                "--processes=1",
+                stdout=out,
+            )
+            self.assertIn("Pruned 1 superseded and 2 duplicate", out.getvalue())
+            self.assertIn("Wrapped 1/1 hashes", out.getvalue())
+            self.assertIn("wrapped_pbkdf2_sha1 (900 iterations): 1", out.getvalue())
+
+            # Only the newest copy of the legacy hash is kept
+            legacy_hash = PasswordHash.objects.get(user=user)
+            self.assertTrue(
+                legacy_hash.password_hash.startswith("wrapped_pbkdf2_sha1$900$")
+            )
+            self.assertTrue(check_password("legacy", legacy_hash.password_hash))
+            self.assertFalse(check_password("wrong", legacy_hash.password_hash))
+
+            # Logging in rehashes it normally
+            self.assertEqual(
+                user, authenticate(username=user.username, password="legacy")
+            )
+            legacy_hash.refresh_from_db()
+            self.assertTrue(legacy_hash.password_hash.startswith("pbkdf2_sha256$1000$"))
+
+    def test_migrate_password_hashes_concurrent_change(self):
+        """Tests that wrapping doesn't overwrite a hash changed in the meantime."""
+        with patch.object(PBKDF2PasswordHasher, "iterations", 1000):
+            user = User.objects.create(
+                username="2021awilliam",
+                password=PBKDF2PasswordHasher().encode("old", "salt", 100),
+            )
+            unchanged_user = User.objects.create(
+                username="2021bwilliam",
+                password=PBKDF2PasswordHasher().encode("other", "salt", 100),
+            )
+
+            def change_password(_pool, func, encoded_hashes, **kwargs):
+                # e.g. in the force password reset view while the hashes are wrapped
+                user.set_password("new")
+                user.save()
+                return map(func, encoded_hashes)
+
+            out = StringIO()
+            with patch.object(ProcessPoolExecutor, "map", change_password):
+                call_command(
+                    "migrate_password_hashes", "--wrap", "--processes=1", stdout=out
+                )
+            self.assertIn("Wrapped 1 hashes, skipped 1", out.getvalue())
+
+            user.refresh_from_db()
+            self.assertTrue(user.password.startswith("pbkdf2_sha256$1000$"))
+            self.assertTrue(user.check_password("new"))
+            self.assertFalse(user.check_password("old"))
+
+            unchanged_user.refresh_from_db()
+            self.assertTrue(
+                unchanged_user.password.startswith("wrapped_pbkdf2_sha256$900$")
+            )
+            self.assertTrue(unchanged_user.check_password("other"))
+
+    def test_password_reset_required_middleware(self):
+        """Tests the password reset redirect, and that it adds no queries."""
+        middleware = PasswordResetRequiredMiddleware(lambda request: HttpResponse())
+
+        # Without a session cookie, neither the session nor the user is loaded
+        request = RequestFactory().get(reverse("authentication:index"))
+        SessionMiddleware(middleware).process_request(request)
+        AuthenticationMiddleware(middleware).process_request(request)
+        with self.assertNumQueries(0):
+            self.assertEqual(200, middleware(request).status_code)
+
+        # Logged in without the flag, pages cost the same queries as without it
+        self.login(accept_tos=True)
+        url = reverse("authentication:index")
+        self.client.get(url)
+        with self.modify_settings(
+            MIDDLEWARE={
+                "remove": "tjdests.apps.authentication.middleware."
+                "PasswordResetRequiredMiddleware"
+            }
+        ):
+            with CaptureQueriesContext(connection) as queries_without:
+                self.client.get(url)
+        with CaptureQueriesContext(connection) as queries_with:
+            self.client.get(url)
+        self.assertEqual(len(queries_without), len(queries_with))
+
+        # With the flag, only the reset page and logout are allowed
+        session = self.client.session
+        session["needs_password_reset"] = True
+        session.save()
+        response = self.client.get(url)
+        self.assertRedirects(
+            response,
+            reverse("authentication:force_password_reset"),
+            fetch_redirect_response=False,
+        )
+        response = self.client.get(reverse("authentication:force_password_reset"))
+        self.assertEqual(200, response.status_code)
+
+    @override_settings(AXES_ENABLED=True, AXES_FAILURE_LIMIT=3)
+    def test_login_lockout(self):
+        """Tests that failed logins are counted in the cache until a lockout."""
+        user = User.objects.create_user(username="2021ttest", password="hello123")
+        url = reverse("authentication:login")
+        wrong_credentials = {"username": user.username, "password": "wrong"}
+
+        # Failures below the limit are not saved to the database
+        for _ in range(2):
+            response = self.client.post(url, wrong_credentials)
+            self.assertEqual(200, response.status_code)
+        self.assertFalse(AccessAttempt.objects.exists())
+
+        # The failure that reaches the limit locks the client out
+        response = self.client.post(url, wrong_credentials)
+        self.assertEqual(403, response.status_code)
+        self.assertEqual(1, AccessAttempt.objects.count())
+
+        # The lockout is saved, so it lasts even if the cache is cleared
+        cache.clear()
+        response = self.client.post(
+            url, {"username": user.username, "password": "hello123"}
+        )
+        self.assertEqual(403, response.status_code)
+
+        # Resetting the lockout allows logging in again
+        reset(username=user.username)
+        self.assertFalse(AccessAttempt.objects.exists())
+        response = self.client.post(
+            url, {"username": user.username, "password": "hello123"}
+        )
+        self.assertEqual(302, response.status_code)
+
+    @override_settings(
+        AXES_ENABLED=True,
+        AXES_FAILURE_LIMIT=3,
+        AXES_LOCKOUT_PARAMETERS=[["username", "ip_address"]],
+    )
+    def test_login_lockout_reset(self):
+        """Tests resetting lockouts and failures by some lockout parameters."""
+        user = User.objects.create_user(username="2021ttest", password="hello123")
+        url = reverse("authentication:login")
+        wrong_credentials = {"username": user.username, "password": "wrong"}
+
+        # Failures below the limit are only reset by every lockout parameter
+        for _ in range(2):
+            self.client.post(url, wrong_credentials)
+        self.assertEqual(0, reset(ip="127.0.0.1"))
+        response = self.client.post(url, wrong_credentials)
+        self.assertEqual(403, response.status_code)
+
+        # A saved lockout is reset by any of them
+        self.assertEqual(1, reset(ip="127.0.0.1"))
+        response = self.client.post(
+            url, {"username": user.username, "password": "hello123"}
+        )
+        self.assertEqual(302, response.status_code)
+        self.client.logout()
+
+        for _ in range(2):
+            self.client.post(url, wrong_credentials)
+        self.assertEqual(0, reset(ip="127.0.0.1", username=user.username))
+        for _ in range(2):
+            response = self.client.post(url, wrong_credentials)
+            self.assertEqual(200, response.status_code)
+
+        # As is a lockout that is only cached, e.g. if its AccessAttempt was
+        # deleted without its keys
+        self.client.post(url, wrong_credentials)
+        with patch.object(SlidingWindowCacheHandler, "post_delete_access_attempt"):
+            AccessAttempt.objects.all().delete()
+        self.assertEqual(0, reset(ip="127.0.0.1", username=user.username))
+        response = self.client.post(
+            url, {"username": user.username, "password": "hello123"}
+        )
+        self.assertEqual(302, response.status_code)
+
+    def test_password_reset_session_engines(self):
+        """Tests the password reset flag with each supported session engine."""
+        for engine in ["cached_db", "cache", "signed_cookies"]:
+            with self.subTest(engine=engine), self.settings(
+                SESSION_ENGINE=f"django.contrib.sessions.backends.{engine}"
+            ):
+                self.client.logout()
+                user = User.objects.create(
+                    username=f"2021{engine}",
+                    accepted_terms=True,
+                    use_additional_hashes=True,
+                )
+                PasswordHash.objects.create(
+                    user=user, password_hash=make_password("legacy")
+                )
+
+                # Logging in with an additional hash sets the flag
+                response = self.client.post(
+                    reverse("authentication:login"),
+                    data={"username": user.username, "password": "legacy"},
+                )
+                self.assertEqual(302, response.status_code)
+                response = self.client.get(reverse("authentication:index"))
+                self.assertRedirects(
+                    response,
+                    reverse("authentication:force_password_reset"),
+                    fetch_redirect_response=False,
+                )
+
+                # Resetting the password clears it
+                response = self.client.post(
+                    reverse("authentication:force_password_reset"),
+                    data={
+                        "new_password1": "correct horse battery staple",
+                        "new_password2": "correct horse battery staple",
+                    },
+                )
+                self.assertRedirects(
+                    response,
+                    reverse("authentication:index"),
+                    fetch_redirect_response=False,
+                )
+                response = self.client.get(reverse("authentication:index"))
+                self.assertEqual(200, response.status_code)
+                self.assertNotIn("needs_password_reset", self.client.session)
+
+    @override_settings(
+        AXES_ENABLED=True,
+        AXES_FAILURE_LIMIT=3,
+        AXES_COOLOFF_TIME=timedelta(seconds=1),
+    )
+    def test_login_lockout_cool_off(self):
+        """Tests that a lockout ends after AXES_COOLOFF_TIME, within the window."""
+        user = User.objects.create_user(username="2021ttest", password="hello123")
+        url = reverse("authentication:login")
+
+        for _ in range(3):
+            response = self.client.post(
+                url, {"username": user.username, "password": "wrong"}
+            )
+        self.assertEqual(403, response.status_code)
+
+        # Still within LOGIN_FAILURE_WINDOW, but the failures are not counted again
+        time.sleep(1.1)
+        response = self.client.post(
+            url, {"username": user.username, "password": "hello123"}
+        )
+        self.assertEqual(302, response.status_code)
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import College, Decision, TestScore
+from .models import College, CollegeYearStats, Decision, TestScore
 
 
 class CollegeAdmin(admin.ModelAdmin):
@@ -28,6 +28,15 @@ class TestScoreAdmin(admin.ModelAdmin):
     readonly_fields = ["last_modified"]
 
 
+class CollegeYearStatsAdmin(admin.ModelAdmin):
+    search_fields = ["college__name"]
+    list_display = ["college", "graduation_year", "count_decisions", "count_attending"]
+    list_filter = ["graduation_year"]
+
+    readonly_fields = CollegeYearStats.COUNT_FIELDS
+
+
 admin.site.register(College, CollegeAdmin)
 admin.site.register(TestScore, TestScoreAdmin)
 admin.site.register(Decision, DecisionAdmin)
+admin.site.register(CollegeYearStats, CollegeYearStatsAdmin)
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class DestinationsConfig(AppConfig):
+    name = "tjdests.apps.destinations"
+
+    def ready(self):
+        # Register the signal handlers that keep CollegeYearStats up to date
+        # pylint: disable-next=import-outside-toplevel,unused-import
+        from . import signals  # noqa: F401
@@ -0,0 +1,97 @@
+import functools
+import re
+import unicodedata
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Set, Tuple
+
+from django.utils.functional import cached_property
+
+from .cache import COLLEGES_GENERATION_KEY, get_generations
+from .models import College
+
+# Maximum number of results returned for a query
+MAX_RESULTS = 20
+
+
+def normalize(text: str) -> str:
+    """Lowercase text and strip accents, e.g. "Université" -> "universite"."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def tokenize(text: str) -> List[str]:
+    return re.findall(r"[^\W_]+", normalize(text))
+
+
+class CollegeIndex:
+    """
+    In-memory index over college names and locations.
+
+    Every token of every name and location is kept in one sorted list, so the
+    colleges with a token starting with a given prefix are found by binary
+    search. A query matches the colleges that have a token starting with each
+    of its words.
+    """
+
+    def __init__(self, colleges: Iterable[Tuple[int, str, str]]):
+        self.labels: Dict[int, str] = {}
+        self.names: Dict[int, str] = {}
+
+        entries: Set[Tuple[str, int]] = set()
+        for college_id, name, location in colleges:
+            # Same as College.__str__
+            self.labels[college_id] = f"{name} - {location}"
+            self.names[college_id] = " ".join(tokenize(name))
+            for token in tokenize(name) + tokenize(location):
+                entries.add((token, college_id))
+
+        self.entries = sorted(entries)
+
+    @cached_property
+    def tokens(self) -> List[str]:
+        return [token for token, _ in self.entries]
+
+    def prefix_matches(self, prefix: str) -> Set[int]:
+        start = bisect_left(self.tokens, prefix)
+        end = bisect_left(self.tokens, prefix + "\U0010ffff", lo=start)
+        return {college_id for _, college_id in self.entries[start:end]}
+
+    def search(self, query: str, limit: int = MAX_RESULTS) -> List[Tuple[int, str]]:
+        """Search for colleges, returning (id, label) pairs."""
+        words = tokenize(query)
+        if not words:
+            return []
+
+        matches = self.prefix_matches(words[0])
+        for word in words[1:]:
+            if not matches:
+                break
+            matches &= self.prefix_matches(word)
+
+        # Colleges whose name starts with the query come first
+        phrase = " ".join(words)
+        ranked = sorted(
+            matches,
+            key=lambda college_id: (
+                not self.names[college_id].startswith(phrase),
+                self.labels[college_id].casefold(),
+                college_id,
+            ),
+        )
+        return [(college_id, self.labels[college_id]) for college_id in ranked[:limit]]
+
+
+# The generation is only used as the cache key
+@functools.lru_cache(maxsize=1)
+# pylint: disable-next=unused-argument
+def _build_college_index(generation: int) -> CollegeIndex:
+    return CollegeIndex(College.objects.values_list("id", "name", "location"))
+
+
+def get_college_index() -> CollegeIndex:
+    """
+    Get the college index, rebuilding it if any college has changed since it
+    was built (in this or any other process; see signals.py).
+    """
+    generation = get_generations([COLLEGES_GENERATION_KEY])[COLLEGES_GENERATION_KEY]
+    return _build_college_index(generation)
@@ -0,0 +1,141 @@
+import hashlib
+import time
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Page, Paginator
+
+from .pagination import CursorPage
+
+# Bumped whenever anything shown on any year's pages changes (e.g. a college)
+GLOBAL_GENERATION_KEY = "destinations:generation"
+
+# Bumped whenever a college is added, changed or removed
+COLLEGES_GENERATION_KEY = "destinations:generation:colleges"
+
+# Graduation years with published data; see views.get_available_graduation_years
+AVAILABLE_YEARS_KEY = "destinations:available_years"
+
+
+def get_generation_key(graduation_year: int) -> str:
+    return f"destinations:generation:{graduation_year}"
+
+
+def _bump(key: str) -> None:
+    # Generations start from the current time rather than zero, so that if a
+    # counter is ever evicted, it cannot come back with a value it has had before.
+    if not cache.add(key, time.time_ns(), timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:  # evicted in the meantime
+            cache.add(key, time.time_ns(), timeout=None)
+
+
+def get_generations(keys: List[str]) -> Dict[str, int]:
+    """Get the current value of each generation counter, starting any that are missing."""
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            _bump(key)
+            generations[key] = cache.get(key)
+    return generations
+
+
+def invalidate_years(graduation_years: Iterable[Optional[int]]) -> None:
+    """Invalidate the cached destinations pages for the given years."""
+    for graduation_year in set(graduation_years):
+        if graduation_year:
+            _bump(get_generation_key(graduation_year))
+
+
+def invalidate_available_years() -> None:
+    """Invalidate the cached list of graduation years with published data."""
+    cache.delete(AVAILABLE_YEARS_KEY)
+
+
+def invalidate_colleges() -> None:
+    """Invalidate everything built from the list of colleges."""
+    _bump(COLLEGES_GENERATION_KEY)
+    invalidate_all()
+
+
+def invalidate_all() -> None:
+    """Invalidate every cached destinations page and the list of years."""
+    _bump(GLOBAL_GENERATION_KEY)
+    invalidate_available_years()
+
+
+class CachedListMixin:
+    """
+    ListView mixin that caches each page of results, for views whose results
+    do not depend on the user viewing them.
+
+    Pages are keyed by the request parameters and by the generation counters
+    for the graduation year shown, which signals.py bumps whenever the data
+    for that year changes. Requests returned by get_cache_year() as None are
+    not cached.
+    """
+
+    cache_prefix = ""
+
+    def get_cache_year(self) -> Optional[int]:
+        raise NotImplementedError
+
+    def get_cache_key(self, graduation_year: int) -> str:
+        generation_keys = [GLOBAL_GENERATION_KEY, get_generation_key(graduation_year)]
+        generations = get_generations(generation_keys)
+
+        params = hashlib.md5(
+            self.request.GET.urlencode().encode()  # type: ignore
+        ).hexdigest()
+        return (
+            f"destinations:{self.cache_prefix}:{graduation_year}:"
+            f"{generations[GLOBAL_GENERATION_KEY]}:"
+            f"{generations[get_generation_key(graduation_year)]}:{params}"
+        )
+
+    def paginate_queryset(self, queryset, page_size):
+        graduation_year = self.get_cache_year()
+        if graduation_year is None:
+            return super().paginate_queryset(queryset, page_size)  # type: ignore
+
+        key = self.get_cache_key(graduation_year)
+        cached = cache.get(key)
+        if cached is not None:
+            return self._page_from_cache(queryset, page_size, cached)
+
+        paginator, page, object_list, is_paginated = super().paginate_queryset(  # type: ignore
+            queryset, page_size
+        )
+        # Evaluating the page also fills its result cache, so it is not queried again
+        if paginator is None:
+            cached = {
+                "object_list": list(object_list),
+                "next_cursor": page.next_cursor,
+                "previous_cursor": page.previous_cursor,
+            }
+        else:
+            cached = {
+                "object_list": list(object_list),
+                "count": paginator.count,
+                "number": page.number,
+            }
+        cache.set(key, cached, getattr(settings, "DESTINATIONS_CACHE_TIMEOUT", 600))
+
+        return paginator, page, object_list, is_paginated
+
+    @staticmethod
+    def _page_from_cache(queryset, page_size, cached):
+        object_list = cached["object_list"]
+
+        if "count" not in cached:
+            page = CursorPage(
+                object_list, cached["next_cursor"], cached["previous_cursor"]
+            )
+            return None, page, object_list, page.has_other_pages()
+
+        paginator = Paginator(queryset, page_size)
+        paginator.count = cached["count"]  # type: ignore  # skip the COUNT query
+        page = Page(object_list, cached["number"], paginator)
+        return paginator, page, object_list, page.has_other_pages()
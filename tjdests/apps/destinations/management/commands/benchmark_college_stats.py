@@ -0,0 +1,132 @@
+import argparse
+import random
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q
+
+from ....authentication.models import User
+from ...models import College, CollegeYearStats, Decision
+from ...stats import compute_college_stats
+
+
+def legacy_college_stats(graduation_year: int) -> list:
+    """The per-status conditional aggregates the colleges page used to run."""
+    year_filter = Q(decision__user__graduation_year=graduation_year)
+    annotations = {
+        field: Count(
+            "decision",
+            filter=Q(
+                decision__admission_status=status,
+                decision__user__publish_data=True,
+            )
+            & year_filter,
+        )
+        for status, field in CollegeYearStats.STATUS_FIELDS.items()
+    }
+    return list(
+        College.objects.annotate(
+            count_decisions=Count(
+                "decision", filter=Q(decision__user__publish_data=True) & year_filter
+            ),
+            count_attending=Count(
+                "decision",
+                filter=Q(
+                    decision__in=Decision.objects.filter(
+                        attending_college__isnull=False
+                    ),
+                    decision__user__publish_data=True,
+                )
+                & year_filter,
+            ),
+            **annotations,
+        ).filter(count_decisions__gte=1)
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks the college statistics query on a synthetic dataset. "
+        "The data is created inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser: argparse.ArgumentParser):
+        parser.add_argument("--students", type=int, default=10000)
+        parser.add_argument("--decisions-per-student", type=int, default=15)
+        parser.add_argument("--colleges", type=int, default=2000)
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        graduation_year = 2000
+        statuses = list(CollegeYearStats.STATUS_FIELDS)
+
+        with transaction.atomic():
+            self.stdout.write("Creating synthetic data...")
+            colleges = College.objects.bulk_create(
+                College(name=f"Benchmark College {i}", location="Benchmark, VA")
+                for i in range(options["colleges"])
+            )
+            password = make_password(None)
+            users = User.objects.bulk_create(
+                (
+                    User(
+                        username=f"benchmark{i}",
+                        password=password,
+                        graduation_year=graduation_year,
+                        publish_data=rng.random() < 0.9,
+                    )
+                    for i in range(options["students"])
+                ),
+                batch_size=1000,
+            )
+            decisions = Decision.objects.bulk_create(
+                (
+                    Decision(
+                        user=user,
+                        college=college,
+                        decision_type=Decision.REGULAR_DECISION,
+                        admission_status=rng.choice(statuses),
+                    )
+                    for user in users
+                    for college in rng.sample(
+                        colleges, options["decisions_per_student"]
+                    )
+                ),
+                batch_size=5000,
+            )
+            per_student = options["decisions_per_student"]
+            for i, user in enumerate(users):
+                start = i * per_student
+                user.attending_decision_id = rng.choice(
+                    decisions[start : start + per_student]  # noqa: E203
+                ).id
+            User.objects.bulk_update(users, ["attending_decision"], batch_size=1000)
+            self.stdout.write(
+                f"Created {len(users)} students and {len(decisions)} decisions."
+            )
+
+            for name, func in [
+                (
+                    "conditional aggregates",
+                    lambda: legacy_college_stats(graduation_year),
+                ),
+                (
+                    "grouped scan",
+                    lambda: compute_college_stats(
+                        Decision.objects.filter(user__graduation_year=graduation_year)
+                    ),
+                ),
+            ]:
+                timings = []
+                for _ in range(options["repeat"]):
+                    start = time.perf_counter()
+                    func()
+                    timings.append(time.perf_counter() - start)
+                self.stdout.write(
+                    f"{name}: best of {len(timings)}: {min(timings):.3f}s"
+                )
+
+            transaction.set_rollback(True)
@@ -1,10 +1,37 @@
 import argparse
 import csv
+from typing import List
 
 from django.core.management.base import BaseCommand
+from django.db import IntegrityError, transaction
 
+from ...cache import invalidate_colleges
 from ...models import College
 
+BATCH_SIZE = 1000
+
+
+def add_colleges(colleges: List[College]) -> List[College]:
+    """
+    Insert colleges with one query, or if any was added since the existing
+    ones were loaded, one at a time. Returns the colleges that were added.
+    """
+    try:
+        with transaction.atomic():
+            College.objects.bulk_create(colleges)
+        return colleges
+    except IntegrityError:
+        pass
+
+    added = []
+    for college in colleges:
+        _, created = College.objects.get_or_create(
+            name=college.name, location=college.location
+        )
+        if created:
+            added.append(college)
+    return added
+
 
 class Command(BaseCommand):
     help = "Imports a CSV containing college information."
@@ -17,6 +44,10 @@ class Command(BaseCommand):
 
         College, City, State, Country
         """
+        existing = set(College.objects.values_list("name", "location"))
+
+        new_colleges = []
+        skipped = 0
         with open(options["file_name"], "r", encoding="utf-8") as file:
             reader = csv.DictReader(file)
 
@@ -26,18 +57,30 @@ class Command(BaseCommand):
                     for item in [line["City"], line["State"], line["Country"]]
                     if item and item != "UNITED STATES"
                 )  # country is assumed to be US
-                result = College.objects.update_or_create(
-                    name=line["College"],
-                    location=processed_location,
-                )
-
-                if result[1]:
-                    self.stdout.write(
-                        f"Added university {result[0].name}.",
-                        style_func=self.style.SUCCESS,
-                    )
-                else:
-                    self.stdout.write(
-                        f"Did not update university {result[0].name}.",
-                        style_func=self.style.WARNING,
-                    )
+                key = (line["College"], processed_location)
+                if key in existing:
+                    skipped += 1
+                    continue
+
+                existing.add(key)
+                new_colleges.append(College(name=key[0], location=key[1]))
+
+        added = []
+        for start in range(0, len(new_colleges), BATCH_SIZE):
+            end = start + BATCH_SIZE
+            added += add_colleges(new_colleges[start:end])
+        skipped += len(new_colleges) - len(added)
+
+        # Bulk inserts do not send the signals that invalidate this
+        invalidate_colleges()
+
+        for college in added:
+            self.stdout.write(
+                f"Added university {college.name}.",
+                style_func=self.style.SUCCESS,
+            )
+        self.stdout.write(
+            f"Added {len(added)} universities, "
+            f"skipped {skipped} that already exist.",
+            style_func=self.style.SUCCESS,
+        )
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from ...stats import rebuild_college_stats
+
+
+class Command(BaseCommand):
+    help = "Recomputes the per-college, per-year decision statistics."
+
+    def handle(self, *args, **options):
+        rows = rebuild_college_stats()
+        self.stdout.write(
+            f"Rebuilt statistics for {rows} colleges and years.",
+            style_func=self.style.SUCCESS,
+        )
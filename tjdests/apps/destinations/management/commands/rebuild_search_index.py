@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from ...cache import invalidate_all
+from ...search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the full-text index used to search students."
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        backend.rebuild()
+        invalidate_all()
+        self.stdout.write(
+            f"Rebuilt the search index using {type(backend).__name__}.",
+            style_func=self.style.SUCCESS,
+        )
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.5 on 2026-10-15 07:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("destinations", "0015_alter_testscore_options"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CollegeYearStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("graduation_year", models.PositiveSmallIntegerField()),
+                ("count_decisions", models.PositiveIntegerField(default=0)),
+                ("count_attending", models.PositiveIntegerField(default=0)),
+                ("count_admit", models.PositiveIntegerField(default=0)),
+                ("count_waitlist", models.PositiveIntegerField(default=0)),
+                ("count_waitlist_admit", models.PositiveIntegerField(default=0)),
+                ("count_waitlist_deny", models.PositiveIntegerField(default=0)),
+                ("count_defer", models.PositiveIntegerField(default=0)),
+                ("count_defer_admit", models.PositiveIntegerField(default=0)),
+                ("count_defer_deny", models.PositiveIntegerField(default=0)),
+                ("count_defer_wl", models.PositiveIntegerField(default=0)),
+                ("count_defer_wl_admit", models.PositiveIntegerField(default=0)),
+                ("count_defer_wl_deny", models.PositiveIntegerField(default=0)),
+                ("count_deny", models.PositiveIntegerField(default=0)),
+                ("count_unknown", models.PositiveIntegerField(default=0)),
+                (
+                    "college",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="year_stats",
+                        to="destinations.college",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "College Year Statistics",
+                "verbose_name_plural": "College Year Statistics",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("graduation_year", "college"),
+                        name="unique_college_year_stats",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-15 07:49
+
+from django.db import migrations
+
+
+def remove_duplicate_decisions(apps, schema_editor):
+    """Keep only the most recent decision for each user and college."""
+    Decision = apps.get_model("destinations", "Decision")
+    User = apps.get_model("authentication", "User")
+
+    kept = {}
+    for decision_id, user_id, college_id in Decision.objects.order_by(
+        "-last_modified", "-id"
+    ).values_list("id", "user_id", "college_id"):
+        key = (user_id, college_id)
+        if key not in kept:
+            kept[key] = decision_id
+            continue
+
+        User.objects.filter(attending_decision_id=decision_id).update(
+            attending_decision_id=kept[key]
+        )
+        Decision.objects.filter(id=decision_id).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("destinations", "0016_collegeyearstats"),
+        ("authentication", "0020_user_biography_html"),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_decisions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-15 07:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("destinations", "0017_remove_duplicate_decisions"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="decision",
+            index=models.Index(
+                fields=["college", "admission_status"],
+                name="decision_college_status_idx",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="decision",
+            constraint=models.UniqueConstraint(
+                fields=("user", "college"), name="unique_decision_user_college"
+            ),
+        ),
+    ]
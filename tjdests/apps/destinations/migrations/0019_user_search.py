@@ -0,0 +1,54 @@
+# Generated by Django 5.2.5 on 2026-10-15 08:02
+
+from django.db import migrations
+
+
+def create_search_table(apps, schema_editor):
+    """Create and fill the full-text index used by search.py, if supported."""
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE authentication_user_search USING fts5("
+            "first_name, last_name, nickname, biography, tokenize = 'unicode61')"
+        )
+        schema_editor.execute(
+            "INSERT INTO authentication_user_search "
+            "(rowid, first_name, last_name, nickname, biography) "
+            "SELECT id, first_name, last_name, nickname, biography "
+            "FROM authentication_user"
+        )
+    elif vendor == "postgresql":
+        schema_editor.execute(
+            "CREATE TABLE authentication_user_search ("
+            "user_id bigint PRIMARY KEY "
+            "REFERENCES authentication_user (id) ON DELETE CASCADE, "
+            "document tsvector NOT NULL)"
+        )
+        schema_editor.execute(
+            "CREATE INDEX authentication_user_search_document_idx "
+            "ON authentication_user_search USING GIN (document)"
+        )
+        schema_editor.execute(
+            "INSERT INTO authentication_user_search (user_id, document) "
+            "SELECT id, "
+            "setweight(to_tsvector('simple', first_name || ' ' || last_name || ' ' "
+            "|| nickname), 'A') || setweight(to_tsvector('simple', biography), 'B') "
+            "FROM authentication_user"
+        )
+
+
+def drop_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor in ["sqlite", "postgresql"]:
+        schema_editor.execute("DROP TABLE authentication_user_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("destinations", "0018_decision_indexes"),
+        ("authentication", "0021_user_published_year_name_idx"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_table, drop_search_table),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.5 on 2026-10-15 08:30
+
+import hashlib
+
+from django.db import migrations
+
+import tjdests.apps.destinations.models
+
+
+def populate_college_hashes(apps, schema_editor):
+    College = apps.get_model("destinations", "College")
+
+    colleges = list(College.objects.only("id", "name", "location"))
+    for college in colleges:
+        college.hash = hashlib.md5(
+            f"{college.name}|{college.location}".encode()
+        ).hexdigest()
+    College.objects.bulk_update(colleges, ["hash"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("destinations", "0019_user_search"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="college",
+            name="hash",
+            field=tjdests.apps.destinations.models.CollegeHashField(
+                db_index=True, default="", editable=False, max_length=32
+            ),
+            preserve_default=False,
+        ),
+        migrations.RunPython(populate_college_hashes, migrations.RunPython.noop),
+    ]
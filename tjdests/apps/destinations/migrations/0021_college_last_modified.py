@@ -0,0 +1,22 @@
+# Generated by Django 5.2.5 on 2026-10-15 10:12
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("destinations", "0020_college_hash"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="college",
+            name="last_modified",
+            field=models.DateTimeField(
+                auto_now=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+    ]
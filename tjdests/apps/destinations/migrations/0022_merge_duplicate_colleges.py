@@ -0,0 +1,58 @@
+# Generated by Django 5.2.5 on 2026-10-15 10:41
+
+from django.db import migrations
+
+
+def merge_duplicate_colleges(apps, schema_editor):
+    """
+    Merge colleges with the same name and location into the oldest one,
+    keeping only the most recent decision of a user for the merged college.
+    """
+    College = apps.get_model("destinations", "College")
+    Decision = apps.get_model("destinations", "Decision")
+    User = apps.get_model("authentication", "User")
+
+    kept_colleges = {}
+    duplicates = {}
+    for college_id, name, location in College.objects.order_by("id").values_list(
+        "id", "name", "location"
+    ):
+        kept_id = kept_colleges.setdefault((name, location), college_id)
+        if kept_id != college_id:
+            duplicates[college_id] = kept_id
+
+    if not duplicates:
+        return
+
+    merged_ids = set(duplicates) | set(duplicates.values())
+    kept_decisions = {}
+    for decision_id, user_id, college_id in (
+        Decision.objects.filter(college_id__in=merged_ids)
+        .order_by("-last_modified", "-id")
+        .values_list("id", "user_id", "college_id")
+    ):
+        key = (user_id, duplicates.get(college_id, college_id))
+        if key not in kept_decisions:
+            kept_decisions[key] = decision_id
+            continue
+
+        User.objects.filter(attending_decision_id=decision_id).update(
+            attending_decision_id=kept_decisions[key]
+        )
+        Decision.objects.filter(id=decision_id).delete()
+
+    for duplicate_id, kept_id in duplicates.items():
+        Decision.objects.filter(college_id=duplicate_id).update(college_id=kept_id)
+    College.objects.filter(id__in=duplicates).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("destinations", "0021_college_last_modified"),
+        ("authentication", "0020_user_biography_html"),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_colleges, migrations.RunPython.noop),
+    ]
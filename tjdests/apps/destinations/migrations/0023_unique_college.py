@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-15 10:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("destinations", "0022_merge_duplicate_colleges"),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="college",
+            constraint=models.UniqueConstraint(
+                fields=("name", "location"), name="unique_college_name_location"
+            ),
+        ),
+    ]
@@ -1,17 +1,51 @@
+import hashlib
+
 from django.db import models
 
 
+def get_college_hash(name: str, location: str) -> str:
+    """Get the hash identifying a college in exports, from its name and location."""
+    return hashlib.md5(f"{name}|{location}".encode()).hexdigest()
+
+
+class CollegeHashField(models.CharField):
+    """
+    Stores get_college_hash() of the college. It is recomputed whenever the
+    college is saved or bulk created, but not by update() or bulk_update().
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("max_length", 32)
+        kwargs.setdefault("editable", False)
+        super().__init__(*args, **kwargs)
+
+    def pre_save(self, model_instance, add):
+        value = get_college_hash(model_instance.name, model_instance.location)
+        setattr(model_instance, self.attname, value)
+        return value
+
+
 class College(models.Model):
     """Represents a college."""
 
     name = models.CharField(max_length=250, null=False, blank=False)
     location = models.CharField(max_length=250, null=False, blank=False)
 
+    hash = CollegeHashField(db_index=True)
+
+    last_modified = models.DateTimeField(auto_now=True)
+
     def __str__(self):
         return f"{self.name} - {self.location}"
 
     class Meta:
         ordering = ["name", "location"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["name", "location"],
+                name="unique_college_name_location",
+            )
+        ]
 
 
 class Decision(models.Model):
@@ -76,6 +110,18 @@ class Decision(models.Model):
 
     class Meta:
         ordering = ["admission_status", "college"]
+        indexes = [
+            models.Index(
+                fields=["college", "admission_status"],
+                name="decision_college_status_idx",
+            ),
+        ]
+        constraints = [
+            # Also serves DecisionForm's duplicate check and college filtering
+            models.UniqueConstraint(
+                fields=["user", "college"], name="unique_decision_user_college"
+            ),
+        ]
 
     def __str__(self):
         return (
@@ -84,6 +130,65 @@ class Decision(models.Model):
         )
 
 
+class CollegeYearStats(models.Model):
+    """
+    Decision statistics for a college and graduation year, counting only
+    published data. Kept up to date by the handlers in signals.py; use the
+    rebuild_college_stats command to recompute everything.
+    """
+
+    # Maps each admission status to the field that counts it.
+    STATUS_FIELDS = {
+        Decision.ADMIT: "count_admit",
+        Decision.WAITLIST: "count_waitlist",
+        Decision.WAITLIST_ADMIT: "count_waitlist_admit",
+        Decision.WAITLIST_DENY: "count_waitlist_deny",
+        Decision.DEFER: "count_defer",
+        Decision.DEFER_ADMIT: "count_defer_admit",
+        Decision.DEFER_DENY: "count_defer_deny",
+        Decision.DEFER_WL: "count_defer_wl",
+        Decision.DEFER_WL_A: "count_defer_wl_admit",
+        Decision.DEFER_WL_D: "count_defer_wl_deny",
+        Decision.DENY: "count_deny",
+        Decision.UNKNOWN: "count_unknown",
+    }
+
+    COUNT_FIELDS = ["count_decisions", "count_attending", *STATUS_FIELDS.values()]
+
+    college = models.ForeignKey(
+        College, on_delete=models.CASCADE, related_name="year_stats"
+    )
+    graduation_year = models.PositiveSmallIntegerField()
+
+    count_decisions = models.PositiveIntegerField(default=0)
+    count_attending = models.PositiveIntegerField(default=0)
+    count_admit = models.PositiveIntegerField(default=0)
+    count_waitlist = models.PositiveIntegerField(default=0)
+    count_waitlist_admit = models.PositiveIntegerField(default=0)
+    count_waitlist_deny = models.PositiveIntegerField(default=0)
+    count_defer = models.PositiveIntegerField(default=0)
+    count_defer_admit = models.PositiveIntegerField(default=0)
+    count_defer_deny = models.PositiveIntegerField(default=0)
+    count_defer_wl = models.PositiveIntegerField(default=0)
+    count_defer_wl_admit = models.PositiveIntegerField(default=0)
+    count_defer_wl_deny = models.PositiveIntegerField(default=0)
+    count_deny = models.PositiveIntegerField(default=0)
+    count_unknown = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "College Year Statistics"
+        verbose_name_plural = "College Year Statistics"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["graduation_year", "college"],
+                name="unique_college_year_stats",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.college} ({self.graduation_year})"
+
+
 class TestScore(models.Model):
     """Represents a test score."""
 
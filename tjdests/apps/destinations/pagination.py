@@ -0,0 +1,136 @@
+import base64
+import binascii
+import json
+from functools import reduce
+from typing import Any, List, Optional, Sequence
+
+from django.conf import settings
+from django.db.models import Q, QuerySet
+from django.http import Http404
+
+
+def encode_cursor(values: Sequence[Any], reverse: bool = False) -> str:
+    data = json.dumps({"r": reverse, "v": list(values)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(data.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """Decode a cursor into (values, reverse). Raises Http404 if it is invalid."""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return data["v"], bool(data["r"])
+    except (binascii.Error, ValueError, KeyError, TypeError) as ex:
+        raise Http404("Invalid cursor") from ex
+
+
+def keyset_filter(fields: Sequence[str], values: Sequence[Any], reverse: bool) -> Q:
+    """
+    Build a filter for rows strictly after (or, if reverse, before) the given
+    values in the ordering given by fields, i.e. a row value comparison.
+    """
+    lookup = "lt" if reverse else "gt"
+    conditions = [
+        Q(
+            **dict(zip(fields[:i], values[:i])),
+            **{f"{fields[i]}__{lookup}": values[i]},
+        )
+        for i in range(len(fields))
+    ]
+    return reduce(lambda a, b: a | b, conditions)
+
+
+class CursorPage:  # pylint: disable=too-few-public-methods
+    """A page of results from keyset pagination."""
+
+    def __init__(
+        self,
+        object_list: List[Any],
+        next_cursor: Optional[str],
+        previous_cursor: Optional[str],
+    ):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    def has_other_pages(self) -> bool:
+        return self.has_next() or self.has_previous()
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class CursorPaginationMixin:
+    """
+    ListView mixin adding keyset (cursor) pagination when the
+    DESTINATIONS_CURSOR_PAGINATION setting is enabled.
+
+    Rather than counting every row and skipping to an offset, each page is
+    fetched by filtering on the last row of the previous one, so every page
+    costs the same as the first. Page numbers are not available in this mode.
+    Querysets that are not ordered by cursor_ordering (e.g. search results
+    ordered by relevance) fall back to regular pagination.
+    """
+
+    cursor_ordering: Sequence[str] = ()
+    cursor_kwarg = "cursor"
+
+    def use_cursor_pagination(self, queryset: QuerySet) -> bool:
+        return getattr(settings, "DESTINATIONS_CURSOR_PAGINATION", False) and tuple(
+            queryset.query.order_by
+        ) == tuple(self.cursor_ordering)
+
+    def paginate_queryset(self, queryset, page_size):
+        if not self.use_cursor_pagination(queryset):
+            return super().paginate_queryset(queryset, page_size)  # type: ignore
+
+        fields = self.cursor_ordering
+        reverse = False
+        cursor = self.request.GET.get(self.cursor_kwarg)  # type: ignore
+        if cursor:
+            values, reverse = decode_cursor(cursor)
+            if len(values) != len(fields):
+                raise Http404("Invalid cursor")
+            queryset = queryset.filter(keyset_filter(fields, values, reverse))
+
+        if reverse:
+            queryset = queryset.reverse()
+
+        # Fetch one extra row to find out whether there is another page
+        object_list = list(queryset[: page_size + 1])
+        has_more = len(object_list) > page_size
+        object_list = object_list[:page_size]
+        if reverse:
+            object_list.reverse()
+
+        def cursor_for(obj, reverse: bool) -> str:
+            return encode_cursor([getattr(obj, field) for field in fields], reverse)
+
+        next_cursor = previous_cursor = None
+        if object_list:
+            if has_more or reverse:
+                next_cursor = cursor_for(object_list[-1], False)
+            if cursor and (has_more or not reverse):
+                previous_cursor = cursor_for(object_list[0], True)
+
+        page = CursorPage(object_list, next_cursor, previous_cursor)
+        return (None, page, object_list, page.has_other_pages())
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)  # type: ignore
+
+        paginator = context.get("paginator")
+        if paginator is not None and context.get("page_obj") is not None:
+            context["page_range"] = paginator.get_elided_page_range(
+                context["page_obj"].number, on_each_side=2, on_ends=1
+            )
+
+        return context
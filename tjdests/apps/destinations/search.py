@@ -0,0 +1,194 @@
+import re
+from typing import Iterable, List
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q, QuerySet
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from ..authentication.models import User
+
+# Table holding the full-text index of users; created by migration 0019.
+SEARCH_TABLE = "authentication_user_search"
+
+# User fields that are searchable
+SEARCH_FIELDS = ("first_name", "last_name", "nickname", "biography")
+
+
+def tokenize(query: str) -> List[str]:
+    """Split a search query into lowercase words, dropping punctuation."""
+    return re.findall(r"\w+", query.lower())
+
+
+class SearchBackend:
+    """
+    Substring search using icontains. Works on every database,
+    but has to scan every row; used when no full-text index is available.
+    """
+
+    def search(self, queryset: QuerySet, query: str) -> QuerySet:
+        return queryset.filter(
+            Q(
+                first_name__icontains=query
+            )  # pylint: disable=unsupported-binary-operation
+            | Q(last_name__icontains=query)
+            | Q(nickname__icontains=query)
+            | Q(biography__icontains=query)
+        )
+
+    def update(self, user_ids: Iterable[int]) -> None:
+        """Reindex the given users."""
+
+    def remove(self, user_ids: Iterable[int]) -> None:
+        """Remove the given users from the index."""
+
+    def rebuild(self) -> None:
+        """Reindex all users."""
+
+
+class SQLiteSearchBackend(SearchBackend):
+    """Full-text search using an SQLite FTS5 table, ranked with BM25."""
+
+    # BM25 weights for each of SEARCH_FIELDS
+    weights = "10.0, 10.0, 10.0, 1.0"
+
+    def search(self, queryset: QuerySet, query: str) -> QuerySet:
+        terms = tokenize(query)
+        if not terms:
+            return super().search(queryset, query)
+
+        # Prefix-match every word
+        match = " ".join(f'"{term}"*' for term in terms)
+
+        return (
+            queryset.filter(
+                id__in=RawSQL(
+                    f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s",
+                    [match],
+                )
+            )
+            .annotate(
+                search_rank=RawSQL(
+                    f"SELECT bm25({SEARCH_TABLE}, {self.weights}) FROM {SEARCH_TABLE} "
+                    f"WHERE {SEARCH_TABLE} MATCH %s "
+                    f"AND rowid = {User._meta.db_table}.id",
+                    [match],
+                )
+            )
+            .order_by("search_rank", *queryset.query.order_by)
+        )
+
+    def update(self, user_ids: Iterable[int]) -> None:
+        user_ids = list(user_ids)
+        if not user_ids:
+            return
+        placeholders = ", ".join(["%s"] * len(user_ids))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({placeholders})", user_ids
+            )
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE} (rowid, {', '.join(SEARCH_FIELDS)}) "
+                f"SELECT id, {', '.join(SEARCH_FIELDS)} FROM {User._meta.db_table} "
+                f"WHERE id IN ({placeholders})",
+                user_ids,
+            )
+
+    def remove(self, user_ids: Iterable[int]) -> None:
+        user_ids = list(user_ids)
+        if not user_ids:
+            return
+        placeholders = ", ".join(["%s"] * len(user_ids))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({placeholders})", user_ids
+            )
+
+    def rebuild(self) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE} (rowid, {', '.join(SEARCH_FIELDS)}) "
+                f"SELECT id, {', '.join(SEARCH_FIELDS)} FROM {User._meta.db_table}"
+            )
+
+
+class PostgreSQLSearchBackend(SearchBackend):
+    """
+    Full-text search using a table of tsvectors with a GIN index,
+    ranked with ts_rank. Names are weighted above the biography.
+    """
+
+    document = (
+        "setweight(to_tsvector('simple', first_name || ' ' || last_name || ' ' "
+        "|| nickname), 'A') || setweight(to_tsvector('simple', biography), 'B')"
+    )
+
+    def search(self, queryset: QuerySet, query: str) -> QuerySet:
+        terms = tokenize(query)
+        if not terms:
+            return super().search(queryset, query)
+
+        # Prefix-match every word
+        tsquery = " & ".join(f"{term}:*" for term in terms)
+
+        return (
+            queryset.filter(
+                id__in=RawSQL(
+                    f"SELECT user_id FROM {SEARCH_TABLE} "
+                    "WHERE document @@ to_tsquery('simple', %s)",
+                    [tsquery],
+                )
+            )
+            .annotate(
+                search_rank=RawSQL(
+                    f"SELECT ts_rank(document, to_tsquery('simple', %s)) "
+                    f"FROM {SEARCH_TABLE} WHERE user_id = {User._meta.db_table}.id",
+                    [tsquery],
+                )
+            )
+            .order_by("-search_rank", *queryset.query.order_by)
+        )
+
+    def update(self, user_ids: Iterable[int]) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE} (user_id, document) "
+                f"SELECT id, {self.document} FROM {User._meta.db_table} "
+                "WHERE id = ANY(%s) "
+                "ON CONFLICT (user_id) DO UPDATE SET document = EXCLUDED.document",
+                [list(user_ids)],
+            )
+
+    def remove(self, user_ids: Iterable[int]) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {SEARCH_TABLE} WHERE user_id = ANY(%s)",
+                [list(user_ids)],
+            )
+
+    def rebuild(self) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE} (user_id, document) "
+                f"SELECT id, {self.document} FROM {User._meta.db_table}"
+            )
+
+
+DEFAULT_BACKENDS = {
+    "sqlite": SQLiteSearchBackend,
+    "postgresql": PostgreSQLSearchBackend,
+}
+
+
+def get_search_backend() -> SearchBackend:
+    """
+    Get the search backend from the STUDENT_SEARCH_BACKEND setting,
+    or the default for the database in use.
+    """
+    backend_path = getattr(settings, "STUDENT_SEARCH_BACKEND", None)
+    if backend_path:
+        return import_string(backend_path)()
+    return DEFAULT_BACKENDS.get(connection.vendor, SearchBackend)()
@@ -0,0 +1,190 @@
+# pylint: disable=unused-argument,protected-access
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from ..authentication.models import DeletedUser, User
+from .cache import invalidate_available_years, invalidate_colleges, invalidate_years
+from .models import College, Decision, TestScore
+from .search import SEARCH_FIELDS, get_search_backend
+from .stats import refresh_college_stats
+
+# User fields that affect the college statistics
+USER_STATS_FIELDS = ("publish_data", "graduation_year", "attending_decision_id")
+
+
+@receiver(pre_save, sender=Decision)
+def remember_decision_stats_key(sender, instance, **kwargs):
+    """Remember which college and year a decision counted towards before saving."""
+    instance._old_stats_key = (
+        Decision.objects.filter(id=instance.id)
+        .values_list("college_id", "user__graduation_year")
+        .first()
+        if instance.id is not None
+        else None
+    )
+
+
+@receiver(post_save, sender=Decision)
+def update_decision_stats(sender, instance, **kwargs):
+    college_ids = {instance.college_id}
+    graduation_years = {instance.user.graduation_year}
+
+    old_key = getattr(instance, "_old_stats_key", None)
+    if old_key is not None:
+        college_ids.add(old_key[0])
+        graduation_years.add(old_key[1])
+
+    refresh_college_stats(college_ids, graduation_years)
+
+
+@receiver(pre_delete, sender=Decision)
+def remember_deleted_decision_stats_key(sender, instance, **kwargs):
+    # The user may be deleted along with the decision, so look up the year now.
+    instance._old_stats_key = (
+        instance.college_id,
+        User.objects.filter(id=instance.user_id)
+        .values_list("graduation_year", flat=True)
+        .first(),
+    )
+
+
+@receiver(post_delete, sender=Decision)
+def update_deleted_decision_stats(sender, instance, **kwargs):
+    college_id, graduation_year = instance._old_stats_key
+    if graduation_year is not None:
+        refresh_college_stats({college_id}, {graduation_year})
+
+
+@receiver(pre_save, sender=User)
+def remember_user_stats_fields(sender, instance, update_fields=None, **kwargs):
+    """Remember the user's publication status, year and attending decision."""
+    instance._old_stats_fields = None
+
+    # e.g. last_login updates on every login
+    if update_fields is not None and not {
+        "publish_data",
+        "graduation_year",
+        "attending_decision",
+    } & set(update_fields):
+        return
+
+    if instance.id is not None:
+        instance._old_stats_fields = (
+            User.objects.filter(id=instance.id).values_list(*USER_STATS_FIELDS).first()
+        )
+
+
+@receiver(post_save, sender=User)
+def update_user_stats(sender, instance, **kwargs):
+    old_fields = getattr(instance, "_old_stats_fields", None)
+    if old_fields is None:
+        return
+
+    new_fields = tuple(getattr(instance, field) for field in USER_STATS_FIELDS)
+    if old_fields == new_fields:
+        return
+
+    old_publish_data, old_graduation_year, old_attending_id = old_fields
+
+    # Nothing was or is counted for an unpublished user
+    if not old_publish_data and not instance.publish_data:
+        return
+
+    decision_ids = {old_attending_id, instance.attending_decision_id} - {None}
+    college_ids = set(
+        Decision.objects.filter(Q(user=instance) | Q(id__in=decision_ids)).values_list(
+            "college_id", flat=True
+        )
+    )
+
+    refresh_college_stats(college_ids, {old_graduation_year, instance.graduation_year})
+
+
+@receiver(post_save, sender=User)
+def update_user_search(sender, instance, update_fields=None, **kwargs):
+    # e.g. last_login updates on every login
+    if update_fields is not None and not set(SEARCH_FIELDS) & set(update_fields):
+        return
+
+    get_search_backend().update([instance.id])
+
+
+@receiver(post_delete, sender=User)
+def remove_user_search(sender, instance, **kwargs):
+    get_search_backend().remove([instance.id])
+
+
+@receiver(post_save, sender=Decision)
+@receiver(post_delete, sender=Decision)
+@receiver(post_save, sender=TestScore)
+@receiver(post_delete, sender=TestScore)
+def invalidate_user_data_cache(sender, instance, **kwargs):
+    try:
+        user = instance.user
+    except User.DoesNotExist:
+        return
+
+    if user.publish_data:
+        invalidate_years([user.graduation_year])
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_cache(sender, instance, update_fields=None, **kwargs):
+    # Neither of these are shown
+    if update_fields is not None and set(update_fields) <= {"last_login", "password"}:
+        return
+
+    graduation_years = []
+    if instance.publish_data:
+        graduation_years.append(instance.graduation_year)
+
+    # Set by remember_user_stats_fields if publish_data or the year may have changed
+    old_fields = getattr(instance, "_old_stats_fields", None)
+    if old_fields is not None and old_fields[0]:
+        graduation_years.append(old_fields[1])
+
+    invalidate_years(graduation_years)
+
+
+@receiver(post_save, sender=User)
+def invalidate_available_years_cache(sender, instance, created=False, **kwargs):
+    if created:
+        if instance.publish_data:
+            invalidate_available_years()
+        return
+
+    # Set by remember_user_stats_fields if publish_data or the year may have changed
+    old_fields = getattr(instance, "_old_stats_fields", None)
+    if old_fields is not None and old_fields[:2] != (
+        instance.publish_data,
+        instance.graduation_year,
+    ):
+        invalidate_available_years()
+
+
+@receiver(post_delete, sender=User)
+def invalidate_deleted_user_cache(sender, instance, **kwargs):
+    if instance.publish_data:
+        invalidate_years([instance.graduation_year])
+        invalidate_available_years()
+
+
+@receiver(post_delete, sender=Decision)
+@receiver(post_delete, sender=TestScore)
+def touch_user_last_modified(sender, instance, **kwargs):
+    # Otherwise nothing of the user's would be modified, and export_users.py
+    # --since would not export them without the deleted row
+    User.objects.filter(id=instance.user_id).update(last_modified=timezone.now())
+
+
+@receiver(post_delete, sender=User)
+def record_deleted_user(sender, instance, **kwargs):
+    DeletedUser.objects.update_or_create(username=instance.username)
+
+
+@receiver(post_save, sender=College)
+@receiver(post_delete, sender=College)
+def invalidate_college_cache(sender, instance, **kwargs):
+    invalidate_colleges()
@@ -0,0 +1,79 @@
+from typing import Dict, Iterable, List, Tuple
+
+from django.db import transaction
+from django.db.models import Count, F, Q, QuerySet
+
+from .cache import invalidate_all
+from .models import CollegeYearStats, Decision
+
+StatsKey = Tuple[int, int]
+
+
+def compute_college_stats(decisions: QuerySet) -> Dict[StatsKey, Dict[str, int]]:
+    """
+    Count published decisions per (college ID, graduation year).
+
+    This is a single grouped scan over the decisions, joined once to their
+    users, with one conditional count per admission status.
+    """
+    status_counts = {
+        field: Count("id", filter=Q(admission_status=status))
+        for status, field in CollegeYearStats.STATUS_FIELDS.items()
+    }
+
+    rows = (
+        decisions.filter(user__publish_data=True, user__graduation_year__gt=0)
+        .values("college_id", "user__graduation_year")
+        .annotate(
+            count_decisions=Count("id"),
+            count_attending=Count("id", filter=Q(user__attending_decision=F("id"))),
+            **status_counts,
+        )
+        .order_by()
+    )
+
+    return {
+        (row.pop("college_id"), row.pop("user__graduation_year")): row for row in rows
+    }
+
+
+def _build_rows(stats: Dict[StatsKey, Dict[str, int]]) -> List[CollegeYearStats]:
+    return [
+        CollegeYearStats(college_id=college_id, graduation_year=year, **counts)
+        for (college_id, year), counts in stats.items()
+    ]
+
+
+def refresh_college_stats(
+    college_ids: Iterable[int], graduation_years: Iterable[int]
+) -> None:
+    """Recompute the stored statistics for the given colleges and years."""
+    college_ids = set(college_ids)
+    graduation_years = {year for year in graduation_years if year}
+    if not college_ids or not graduation_years:
+        return
+
+    stats = compute_college_stats(
+        Decision.objects.filter(
+            college_id__in=college_ids, user__graduation_year__in=graduation_years
+        )
+    )
+
+    with transaction.atomic():
+        CollegeYearStats.objects.filter(
+            college_id__in=college_ids, graduation_year__in=graduation_years
+        ).delete()
+        CollegeYearStats.objects.bulk_create(_build_rows(stats))
+
+
+def rebuild_college_stats() -> int:
+    """Recompute all stored statistics from scratch. Returns the number of rows."""
+    rows = _build_rows(compute_college_stats(Decision.objects.all()))
+
+    with transaction.atomic():
+        CollegeYearStats.objects.all().delete()
+        CollegeYearStats.objects.bulk_create(rows)
+
+    invalidate_all()
+
+    return len(rows)
@@ -1,28 +1,96 @@
+import functools
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict
+
 import mistune
 from pygments import highlight
 from pygments.formatters import html
+from pygments.lexer import Lexer
 from pygments.lexers import get_lexer_by_name
 
 from django import template
 
 register = template.Library()
 
+# Number of rendered documents to keep, keyed by a hash of their source
+RENDER_CACHE_SIZE = 1024
+
+# Formatters keep no state between calls, so one is shared by every code block
+_formatter = html.HtmlFormatter()
+
+
+@functools.lru_cache(maxsize=64)
+def get_lexer(name: str) -> Lexer:
+    return get_lexer_by_name(name, stripall=True)
+
 
 class HighlightRenderer(mistune.HTMLRenderer):
     def block_code(self, code, info=None):
         if info:
-            lexer = get_lexer_by_name(info, stripall=True)
-            formatter = html.HtmlFormatter()
-            return highlight(code, lexer, formatter)
+            return highlight(code, get_lexer(info), _formatter)
         return "<pre><code>" + mistune.escape(code) + "</code></pre>"
 
 
+class RenderCache:
+    """A thread-safe LRU cache of rendered HTML, with hit and miss counters."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            html_text = self._entries.get(key)
+            if html_text is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            return html_text
+
+    def set(self, key: str, html_text: str) -> None:
+        with self._lock:
+            self._entries[key] = html_text
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def info(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+
+# Built once per process; parsing state is kept per call, not on the parser
+_markdown = mistune.create_markdown(
+    renderer=HighlightRenderer(),
+    plugins=["footnotes", "strikethrough", "table"],
+    escape=False,
+)
+
+render_cache = RenderCache(RENDER_CACHE_SIZE)
+
+
 @register.filter(name="markdown")
 def convert_markdown(text: str):
     """Convert text to markdown HTML."""
-    markdown = mistune.create_markdown(
-        renderer=HighlightRenderer(),
-        plugins=["footnotes", "strikethrough", "table"],
-        escape=False,
-    )
-    return markdown(text)
+    key = hashlib.sha256(text.encode()).hexdigest()
+    html_text = render_cache.get(key)
+    if html_text is None:
+        html_text = _markdown(text)
+        render_cache.set(key, html_text)
+    return html_text
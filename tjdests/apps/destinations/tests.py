@@ -1,11 +1,26 @@
+# pylint: disable=too-many-lines
+import hashlib
+import importlib
+import json
+import os
+import tempfile
+from contextlib import redirect_stdout
+from io import StringIO
 from unittest.mock import mock_open, patch
 
+from django.contrib.auth.hashers import check_password
 from django.core.management import CommandError, call_command
+from django.db import connection
 from django.http import HttpResponseRedirect
+from django.test import SimpleTestCase
 from django.urls import reverse
+from django.utils import timezone
 
 from ...test import TJDestsTestCase
-from .models import College, Decision
+from ..authentication.models import User
+from .models import College, CollegeYearStats, Decision, TestScore, get_college_hash
+from .templatetags.markdown import convert_markdown, render_cache
+from .views import get_available_graduation_years, get_current_academic_year
 
 
 class DestinationsTest(TJDestsTestCase):
@@ -189,6 +204,131 @@ class DestinationsTest(TJDestsTestCase):
         self.assertNotIn(user, response.context["object_list"])
         self.assertNotIn(user2, response.context["object_list"])
 
+    def test_destinations_list_query_count(self):
+        """Tests that the destinations list runs a constant number of queries."""
+        user = self.login(
+            make_student=True, make_senior=True, accept_tos=True, publish_data=True
+        )
+        college = College.objects.create(name="test college", location="Arlington, VA")
+        decision = Decision.objects.create(
+            college=college, user=user, decision_type="ED", admission_status="ADMIT"
+        )
+        user.attending_decision = decision
+        user.save()
+
+        # user, count, years, seniors, test scores, decisions (the session is cached)
+        with self.assertNumQueries(6):
+            response = self.client.get(reverse("destinations:students"))
+        self.assertEqual(200, response.status_code)
+        self.assertIn("fa-check-double", response.content.decode("UTF-8"))
+
+        # Fill the page with seniors that have many decisions and test scores
+        colleges = College.objects.bulk_create(
+            College(name=f"college {i}", location="Alexandria, VA") for i in range(20)
+        )
+        for i in range(25):
+            senior = User.objects.create(
+                username=f"2021senior{i}",
+                last_name=f"Senior {i}",
+                graduation_year=user.graduation_year,
+                publish_data=True,
+            )
+            Decision.objects.bulk_create(
+                Decision(
+                    college=other_college,
+                    user=senior,
+                    decision_type="RD",
+                    admission_status="ADMIT",
+                )
+                for other_college in colleges
+            )
+            senior.attending_decision = senior.decision_set.first()
+            senior.save()
+            TestScore.objects.create(
+                user=senior, exam_type=TestScore.SAT_TOTAL, exam_score=1600
+            )
+
+        with self.assertNumQueries(6):
+            response = self.client.get(reverse("destinations:students"))
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(20, len(response.context["object_list"]))
+
+    def test_destinations_list_cache(self):
+        """Tests that the destinations lists are cached until their data changes."""
+        user = self.login(
+            make_student=True, make_senior=True, accept_tos=True, publish_data=True
+        )
+        college = College.objects.create(name="test college", location="Arlington, VA")
+        decision = Decision.objects.create(
+            college=college, user=user, decision_type="ED", admission_status="ADMIT"
+        )
+
+        response = self.client.get(reverse("destinations:students"))
+        self.assertIn("test college", response.content.decode("UTF-8"))
+
+        # user (the session is cached)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("destinations:students"))
+        self.assertIn("test college", response.content.decode("UTF-8"))
+        self.assertEqual([user], list(response.context["object_list"]))
+        # Credentials are not stored in the cache
+        self.assertTrue(
+            {"password", "email"}
+            <= response.context["object_list"][0].get_deferred_fields()
+        )
+
+        # Changing a decision invalidates the cached page
+        decision.admission_status = "WAITLIST"
+        decision.save()
+        response = self.client.get(reverse("destinations:students"))
+        self.assertIn("Waitlisted", response.content.decode("UTF-8"))
+
+        # So does a test score
+        TestScore.objects.create(
+            user=user, exam_type=TestScore.SAT_TOTAL, exam_score=1550
+        )
+        response = self.client.get(reverse("destinations:students"))
+        self.assertIn("1550", response.content.decode("UTF-8"))
+
+        # And unpublishing
+        user.publish_data = False
+        user.save()
+        response = self.client.get(reverse("destinations:students"))
+        self.assertEqual([], list(response.context["object_list"]))
+
+        # But not logging in
+        user.publish_data = True
+        user.save()
+        self.client.get(reverse("destinations:students"))
+        user.save(update_fields=["last_login"])
+        with self.assertNumQueries(1):
+            self.client.get(reverse("destinations:students"))
+
+        # The colleges list is cached too, and renaming a college invalidates it
+        response = self.client.get(reverse("destinations:colleges"))
+        self.assertIn("test college", response.content.decode("UTF-8"))
+        with self.assertNumQueries(1):
+            self.client.get(reverse("destinations:colleges"))
+        college.name = "renamed college"
+        college.save()
+        response = self.client.get(reverse("destinations:colleges"))
+        self.assertIn("renamed college", response.content.decode("UTF-8"))
+
+        # Other years are not affected by changes to this one
+        other = User.objects.create(
+            username="2020senior", graduation_year=user.graduation_year - 1
+        )
+        response = self.client.get(
+            reverse("destinations:students"), data={"year": user.graduation_year}
+        )
+        other.publish_data = True
+        other.save()
+        # user, years
+        with self.assertNumQueries(2):
+            self.client.get(
+                reverse("destinations:students"), data={"year": user.graduation_year}
+            )
+
     def test_colleges_list(self):
         """Tests the view to list colleges."""
 
@@ -321,6 +461,353 @@ class DestinationsTest(TJDestsTestCase):
         self.assertIn(college, response.context["object_list"])
         self.assertIn(college2, response.context["object_list"])
 
+    def test_available_graduation_years(self):
+        """Tests that the available years are cached until they change."""
+        current_year = get_current_academic_year()
+        user = User.objects.create(username="2020senior", graduation_year=2020)
+
+        self.assertEqual([current_year], get_available_graduation_years())
+        with self.assertNumQueries(0):
+            self.assertEqual([current_year], get_available_graduation_years())
+
+        user.publish_data = True
+        user.save()
+        self.assertEqual([current_year, 2020], get_available_graduation_years())
+
+        user.graduation_year = 2019
+        user.save()
+        User.objects.create(
+            username="2018senior", graduation_year=2018, publish_data=True
+        )
+        self.assertEqual([current_year, 2019, 2018], get_available_graduation_years())
+
+        # Other changes do not invalidate the cache
+        user.biography = "Hello"
+        user.save()
+        with self.assertNumQueries(0):
+            get_available_graduation_years()
+
+        user.delete()
+        self.assertEqual([current_year, 2018], get_available_graduation_years())
+
+    def test_markdown_render_cache(self):
+        """Tests that rendered markdown is cached by the hash of its source."""
+        render_cache.clear()
+
+        text = "**hello**[^1]\n\n[^1]: a note\n\n```python\nprint(1)\n```"
+        rendered = convert_markdown(text)
+        self.assertIn("<strong>hello</strong>", rendered)
+        self.assertIn("a note", rendered)
+        self.assertIn('<div class="highlight">', rendered)
+        self.assertEqual(rendered, convert_markdown(text))
+
+        # Footnotes from one document do not leak into the next
+        self.assertNotIn("a note", convert_markdown("[^1]\n\n[^1]: another note"))
+
+        info = render_cache.info()
+        self.assertEqual(1, info["hits"])
+        self.assertEqual(2, info["misses"])
+        self.assertEqual(2, info["size"])
+
+    def test_college_autocomplete(self):
+        """Tests the college autocomplete endpoint."""
+        url = reverse("destinations:autocomplete")
+        response = self.client.get(url, data={"q": "test"})
+        self.assertEqual(302, response.status_code)
+
+        self.login(make_student=True, make_senior=True, accept_tos=True)
+        mit = College.objects.create(
+            name="Massachusetts Institute of Technology", location="Cambridge, MA"
+        )
+        tech = College.objects.create(
+            name="Virginia Polytechnic Institute", location="Blacksburg, VA"
+        )
+        uni = College.objects.create(
+            name="Université de Montréal", location="Montréal, QC"
+        )
+
+        def search(query):
+            response = self.client.get(url, data={"q": query})
+            self.assertEqual(200, response.status_code)
+            return [result["id"] for result in response.json()["results"]]
+
+        # Words match the start of any word in the name or location
+        self.assertEqual([mit.id, tech.id], search("inst"))
+        self.assertEqual([tech.id], search("institute VA"))
+        self.assertEqual([mit.id], search("tech camb"))
+        self.assertEqual([], search("technology blacksburg"))
+        self.assertEqual([], search(""))
+
+        # Accents and case are ignored
+        self.assertEqual([uni.id], search("UNIVERSITE montr"))
+        self.assertEqual(
+            [{"id": uni.id, "text": str(uni)}],
+            self.client.get(url, data={"q": "montreal"}).json()["results"],
+        )
+
+        # Colleges whose name starts with the query come first
+        technion = College.objects.create(name="Technion", location="Haifa, Israel")
+        self.assertEqual([technion.id, mit.id], search("tech"))
+
+        # The index is rebuilt when colleges change
+        tech.name = "Virginia Tech"
+        tech.save()
+        self.assertEqual([mit.id], search("inst"))
+        mit.delete()
+        self.assertEqual([], search("inst"))
+
+    def test_college_hash(self):
+        """Tests that colleges store the hash identifying them in exports."""
+        college = College.objects.create(name="test college", location="Arlington, VA")
+        self.assertEqual(
+            hashlib.md5(b"test college|Arlington, VA").hexdigest(), college.hash
+        )
+
+        college.location = "Fairfax, VA"
+        college.save()
+        self.assertEqual(
+            college,
+            College.objects.get(hash=get_college_hash("test college", "Fairfax, VA")),
+        )
+
+        # Bulk created colleges get hashes too
+        College.objects.bulk_create(
+            [College(name="other college", location="Alexandria, VA")]
+        )
+        self.assertTrue(
+            College.objects.filter(
+                hash=get_college_hash("other college", "Alexandria, VA")
+            ).exists()
+        )
+
+    def test_college_stats(self):
+        """Tests maintaining and rebuilding the per-college statistics."""
+        user = self.login(
+            make_student=True, accept_tos=True, make_senior=True, publish_data=True
+        )
+        college = College.objects.create(name="test college", location="Arlington, VA")
+        decision = Decision.objects.create(
+            college=college, user=user, decision_type="RD", admission_status="ADMIT"
+        )
+
+        stats = CollegeYearStats.objects.get(
+            college=college, graduation_year=user.graduation_year
+        )
+        self.assertEqual(1, stats.count_decisions)
+        self.assertEqual(1, stats.count_admit)
+
+        # Moving the decision to another college moves the statistics with it
+        college2 = College.objects.create(
+            name="university of test", location="Alexandria, VA"
+        )
+        decision.college = college2
+        decision.save()
+        self.assertFalse(CollegeYearStats.objects.filter(college=college).exists())
+        self.assertEqual(
+            1, CollegeYearStats.objects.get(college=college2).count_decisions
+        )
+
+        # Changing the graduation year moves them to the other year
+        user.graduation_year -= 1
+        user.save()
+        self.assertEqual(
+            user.graduation_year, CollegeYearStats.objects.get().graduation_year
+        )
+
+        # Bulk updates skip signals, so the command is needed to catch up
+        Decision.objects.filter(id=decision.id).update(admission_status="DENY")
+        self.assertEqual(1, CollegeYearStats.objects.get().count_admit)
+
+        call_command("rebuild_college_stats")
+        stats = CollegeYearStats.objects.get()
+        self.assertEqual(0, stats.count_admit)
+        self.assertEqual(1, stats.count_deny)
+
+        decision.delete()
+        self.assertFalse(CollegeYearStats.objects.exists())
+
+    def test_pagination(self):
+        """Tests page number and cursor pagination of the destinations list."""
+        user = self.login(
+            make_student=True, make_senior=True, accept_tos=True, publish_data=True
+        )
+        user.last_name = "Aardvark"
+        user.save()
+        User.objects.bulk_create(
+            User(
+                username=f"2021senior{i}",
+                last_name="Senior",
+                preferred_name=f"{i:03}",
+                graduation_year=user.graduation_year,
+                publish_data=True,
+            )
+            for i in range(300)
+        )
+        expected = list(
+            User.objects.filter(publish_data=True).order_by(
+                "last_name", "preferred_name", "id"
+            )
+        )
+
+        # Page numbers are elided
+        response = self.client.get(reverse("destinations:students"), data={"page": 8})
+        self.assertEqual(expected[140:160], list(response.context["object_list"]))
+        self.assertIn("…", response.content.decode("UTF-8"))
+        self.assertIn("?page=16", response.content.decode("UTF-8"))
+        self.assertNotIn("?page=12", response.content.decode("UTF-8"))
+
+        with self.settings(DESTINATIONS_CURSOR_PAGINATION=True):
+            # No COUNT query in cursor mode (the years were cached above)
+            with self.assertNumQueries(4):
+                response = self.client.get(reverse("destinations:students"))
+
+            # Walk forwards through every page...
+            seen = list(response.context["object_list"])
+            self.assertFalse(response.context["page_obj"].has_previous())
+            while response.context["page_obj"].has_next():
+                response = self.client.get(
+                    reverse("destinations:students"),
+                    data={"cursor": response.context["page_obj"].next_cursor},
+                )
+                self.assertIn("cursor=", response.content.decode("UTF-8"))
+                seen.extend(response.context["object_list"])
+            self.assertEqual(expected, seen)
+
+            # ...and back again
+            seen = list(response.context["object_list"])
+            while response.context["page_obj"].has_previous():
+                response = self.client.get(
+                    reverse("destinations:students"),
+                    data={"cursor": response.context["page_obj"].previous_cursor},
+                )
+                seen[:0] = response.context["object_list"]
+            self.assertEqual(expected, seen)
+
+            response = self.client.get(
+                reverse("destinations:students"), data={"cursor": "garbage"}
+            )
+            self.assertEqual(404, response.status_code)
+
+            # Colleges are paginated by cursor as well
+            response = self.client.get(reverse("destinations:colleges"))
+            self.assertEqual(200, response.status_code)
+            self.assertIsNone(response.context["paginator"])
+
+    def test_student_search(self):
+        """Tests the full-text search backends used by the destinations list."""
+        self.login(make_student=True, accept_tos=True, make_senior=True)
+        year = get_current_academic_year()
+        angela = User.objects.create(
+            username="2021awilliam",
+            first_name="Angela",
+            last_name="William",
+            biography="I like robotics.",
+            graduation_year=year,
+            publish_data=True,
+        )
+        adam = User.objects.create(
+            username="2021aadams",
+            first_name="Adam",
+            last_name="Adams",
+            biography="Ask Angela about robots!",
+            graduation_year=year,
+            publish_data=True,
+        )
+
+        # Name matches rank above biography matches
+        response = self.client.get(
+            reverse("destinations:students"), data={"q": "angela"}
+        )
+        self.assertEqual([angela, adam], list(response.context["object_list"]))
+
+        # Prefixes match
+        response = self.client.get(
+            reverse("destinations:students"), data={"q": "robot"}
+        )
+        self.assertEqual({angela, adam}, set(response.context["object_list"]))
+
+        # Every word has to match; punctuation is ignored
+        response = self.client.get(
+            reverse("destinations:students"), data={"q": "robotics, Angela"}
+        )
+        self.assertEqual([angela], list(response.context["object_list"]))
+
+        # The index is kept up to date on save
+        adam.biography = "Nothing to see here."
+        adam.save()
+        response = self.client.get(
+            reverse("destinations:students"), data={"q": "robot"}
+        )
+        self.assertEqual([angela], list(response.context["object_list"]))
+
+        # The substring backend is still available
+        with self.settings(
+            STUDENT_SEARCH_BACKEND="tjdests.apps.destinations.search.SearchBackend"
+        ):
+            response = self.client.get(
+                reverse("destinations:students"), data={"q": "ngel"}
+            )
+            self.assertEqual([angela], list(response.context["object_list"]))
+
+        # Rebuilding picks up changes that skipped the signals
+        User.objects.filter(id=adam.id).update(biography="robots")
+        call_command("rebuild_search_index")
+        response = self.client.get(
+            reverse("destinations:students"), data={"q": "robot"}
+        )
+        self.assertEqual({angela, adam}, set(response.context["object_list"]))
+
+    def assertUsesIndex(self, queryset, index_name):  # pylint: disable=invalid-name
+        """Asserts that the database plans to use the given index for a query."""
+        if connection.vendor == "postgresql":
+            # Tiny test tables would otherwise always be scanned sequentially
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        self.assertIn(index_name, queryset.explain())
+
+    def test_query_plans(self):
+        """Tests that the list and form queries are served by indexes."""
+        if connection.vendor not in ["sqlite", "postgresql"]:
+            self.skipTest("Query plans are only checked on SQLite and PostgreSQL")
+
+        # The unique constraint's index is named automatically on SQLite
+        unique_user_college = (
+            "sqlite_autoindex_destinations_decision_1"
+            if connection.vendor == "sqlite"
+            else "unique_decision_user_college"
+        )
+
+        # StudentDestinationListView
+        students = User.objects.filter(publish_data=True, graduation_year=2021)
+        self.assertUsesIndex(
+            students.order_by("last_name", "preferred_name"),
+            "user_published_year_name_idx",
+        )
+        self.assertUsesIndex(
+            students.filter(decision__college__id=1), unique_user_college
+        )
+
+        # get_available_graduation_years
+        self.assertUsesIndex(
+            User.objects.filter(publish_data=True, graduation_year__gt=0)
+            .values_list("graduation_year", flat=True)
+            .distinct(),
+            "user_published_year_name_idx",
+        )
+
+        # DecisionForm.clean
+        self.assertUsesIndex(
+            Decision.objects.filter(user_id=1, college_id=1), unique_user_college
+        )
+
+        # College statistics refresh
+        self.assertUsesIndex(
+            Decision.objects.filter(college_id__in=[1, 2]).values(
+                "college_id", "admission_status"
+            ),
+            "decision_college_status_idx",
+        )
+
     def test_import_ceeb_command(self):
         # First, just call the command
         with self.assertRaises(CommandError):
@@ -373,13 +860,19 @@ class DestinationsTest(TJDestsTestCase):
             "RANDOMCOUNTRY,University of Abroad in CityTwo,CityTwo,RANDOM\n"
         )
 
+        # One query loads the existing colleges and one inserts the new ones
+        # (in a savepoint)
+        out = StringIO()
         with patch(
             "tjdests.apps.destinations.management.commands.import_ceeb.open",
             mock_open(read_data=file_contents),
-        ) as mock_obj:
-            call_command("import_ceeb", "foo.csv")
+        ) as mock_obj, self.assertNumQueries(4):
+            call_command("import_ceeb", "foo.csv", stdout=out)
 
         mock_obj.assert_called_with("foo.csv", "r", encoding="utf-8")
+        self.assertIn(
+            "Added 2 universities, skipped 2 that already exist.", out.getvalue()
+        )
 
         self.assertEqual(
             1,
@@ -407,3 +900,380 @@ class DestinationsTest(TJDestsTestCase):
                 location="CityTwo, RANDOM, RANDOMCOUNTRY",
             ).count(),
         )
+
+        # Colleges added since the existing ones were loaded are skipped, and
+        # not reported as added
+        file_contents = (
+            "Country,College,City,State\n"
+            "UNITED STATES,Test University,Alexandria,VA\n"
+            "UNITED STATES,New University,Fairfax,VA\n"
+        )
+        out = StringIO()
+        with patch(
+            "tjdests.apps.destinations.management.commands.import_ceeb.open",
+            mock_open(read_data=file_contents),
+        ), patch.object(College.objects, "values_list", return_value=[]):
+            call_command("import_ceeb", "foo.csv", stdout=out)
+
+        self.assertIn("Added university New University.", out.getvalue())
+        self.assertNotIn("Added university Test University.", out.getvalue())
+        self.assertIn(
+            "Added 1 universities, skipped 1 that already exist.", out.getvalue()
+        )
+        self.assertEqual(1, College.objects.filter(name="Test University").count())
+        self.assertTrue(College.objects.filter(name="New University").exists())
+
+    def test_import_colleges_script(self):
+        """Tests the added and skipped counts of import_colleges.py."""
+        # The import script is at the top of the repository, next to manage.py
+        import_colleges = importlib.import_module("import_colleges")
+
+        College.objects.create(name="Test University", location="Alexandria, VA")
+        colleges = {
+            get_college_hash(name, location): {"name": name, "location": location}
+            for name, location in [
+                ("Test University", "Alexandria, VA"),
+                ("Old University", "Fairfax, VA"),
+                ("New University", "Fairfax, VA"),
+            ]
+        }
+
+        with tempfile.TemporaryDirectory() as directory:
+            json_file = os.path.join(directory, "colleges_export.json")
+            with open(json_file, "w", encoding="utf-8") as file:
+                json.dump(colleges, file)
+
+            out = StringIO()
+            with redirect_stdout(out):
+                import_colleges.import_colleges_from_json(json_file, batch_size=2)
+            self.assertIn("Imported: 2", out.getvalue())
+            self.assertIn("Skipped (already exists): 1", out.getvalue())
+
+            # Colleges added since the existing ones were loaded are skipped,
+            # and not counted as imported
+            College.objects.filter(name="New University").delete()
+            out = StringIO()
+            with redirect_stdout(out), patch.object(
+                College.objects, "values_list", return_value=[]
+            ):
+                import_colleges.import_colleges_from_json(json_file, batch_size=2)
+            self.assertIn("Imported: 1", out.getvalue())
+            self.assertIn("Skipped (already exists): 2", out.getvalue())
+
+        self.assertEqual(3, College.objects.count())
+
+    def test_export_users_delta_deletions(self):
+        """Tests that export_users.py --since passes on deleted rows and users."""
+        # The export script is at the top of the repository, next to manage.py
+        export_users = importlib.import_module("export_users").export_users
+
+        def export_delta(since):
+            return dict(export_users(StringIO(), "ndjson", since=since))
+
+        user = User.objects.create(username="2021awilliam", publish_data=True)
+        college = College.objects.create(name="test college", location="Arlington, VA")
+        decision = Decision.objects.create(
+            college=college, user=user, decision_type="RD", admission_status="ADMIT"
+        )
+        test_score = TestScore.objects.create(
+            user=user, exam_type=TestScore.SAT_TOTAL, exam_score=1500
+        )
+
+        since = timezone.now()
+        self.assertEqual({}, export_delta(since))
+
+        # Deleting a decision or test score exports the user without it
+        decision.delete()
+        self.assertEqual([], export_delta(since)[str(user.id)]["decisions"])
+
+        since = timezone.now()
+        test_score.delete()
+        self.assertEqual([], export_delta(since)[str(user.id)]["test_scores"])
+
+        # Deleting a user exports a tombstone
+        since = timezone.now()
+        user.delete()
+        self.assertEqual(
+            {"deleted:2021awilliam": {"username": "2021awilliam", "deleted": True}},
+            export_delta(since),
+        )
+
+        # Unless a user with the same username was created again
+        User.objects.create(username="2021awilliam")
+        self.assertNotIn("deleted:2021awilliam", export_delta(since))
+
+    def test_import_users_round_trip(self):
+        """Tests that import_users.py brings back what export_users.py exported."""
+        # The scripts are at the top of the repository, next to manage.py
+        export_users = importlib.import_module("export_users").export_users
+        import_users = importlib.import_module("import_users").import_users
+
+        college = College.objects.create(name="test college", location="Arlington, VA")
+        other_college = College.objects.create(name="other college", location="VA")
+        user = User.objects.create(
+            username="2021awilliam",
+            first_name="Angela",
+            last_name="William",
+            email="2021awilliam@tjhsst.edu",
+            GPA=4.0,
+            is_student=True,
+            publish_data=True,
+            biography="Hello",
+        )
+        user.set_password("password")
+        user.save()
+        decision = Decision.objects.create(
+            college=college, user=user, decision_type="RD", admission_status="ADMIT"
+        )
+        Decision.objects.create(
+            college=other_college,
+            user=user,
+            decision_type="EA",
+            admission_status="DENY",
+        )
+        user.attending_decision = decision
+        user.save()
+        for exam_score in [1500, 1500]:
+            TestScore.objects.create(
+                user=user, exam_type=TestScore.SAT_TOTAL, exam_score=exam_score
+            )
+        TestScore.objects.create(user=user, exam_type=TestScore.ACT_COMP, exam_score=34)
+        User.objects.create(username="2021bwilliam", first_name="Bob")
+
+        entries = [entry for _, entry in export_users(StringIO(), "ndjson")]
+        User.objects.all().delete()
+
+        # A user that can't be saved fails the batch, whose users are then
+        # retried one at a time
+        bad_entry = {**entries[1], "username": "2021cwilliam", "gpa": "not a GPA"}
+        out = StringIO()
+        with redirect_stdout(out):
+            counts = import_users([entries[0], bad_entry, entries[1]], batch_size=10)
+        self.assertEqual((2, 2, 1), counts)
+        self.assertIn("retrying its users one at a time", out.getvalue())
+        self.assertIn("Unexpected error importing 2021cwilliam", out.getvalue())
+        self.assertFalse(User.objects.filter(username="2021cwilliam").exists())
+
+        user = User.objects.get(username="2021awilliam")
+        self.assertEqual("Angela", user.first_name)
+        self.assertEqual("2021awilliam@tjhsst.edu", user.email)
+        self.assertEqual(4, user.GPA)
+        self.assertTrue(user.publish_data)
+        self.assertIn("Hello", user.biography_html)
+        self.assertEqual(
+            {
+                (college.id, "RD", "ADMIT"),
+                (other_college.id, "EA", "DENY"),
+            },
+            set(
+                user.decision_set.values_list(
+                    "college_id", "decision_type", "admission_status"
+                )
+            ),
+        )
+        self.assertEqual(
+            [
+                (TestScore.ACT_COMP, 34),
+                (TestScore.SAT_TOTAL, 1500),
+                (TestScore.SAT_TOTAL, 1500),
+            ],
+            sorted(user.testscore_set.values_list("exam_type", "exam_score")),
+        )
+        self.assertEqual(college, user.attending_decision.college)
+        self.assertEqual(user, user.attending_decision.user)
+
+        # The exported password is kept as an additional hash
+        self.assertFalse(user.has_usable_password())
+        self.assertTrue(user.use_additional_hashes)
+        self.assertTrue(
+            check_password("password", user.additional_hashes.get().password_hash)
+        )
+        self.assertFalse(
+            User.objects.get(username="2021bwilliam").additional_hashes.exists()
+        )
+
+    def test_import_users_sync(self):
+        """Tests that import_users.py --sync can import an export or delta again."""
+        # The scripts are at the top of the repository, next to manage.py
+        export_users = importlib.import_module("export_users").export_users
+        import_users_from_json = importlib.import_module(
+            "import_users"
+        ).import_users_from_json
+
+        college = College.objects.create(name="test college", location="Arlington, VA")
+        other_college = College.objects.create(name="other college", location="VA")
+        user = User.objects.create(username="2021awilliam", publish_data=True)
+        decision = Decision.objects.create(
+            college=college, user=user, decision_type="RD", admission_status="ADMIT"
+        )
+        Decision.objects.create(
+            college=other_college,
+            user=user,
+            decision_type="EA",
+            admission_status="DEFER",
+        )
+        user.attending_decision = decision
+        user.save()
+        for exam_score in [1500, 1500]:
+            TestScore.objects.create(
+                user=user, exam_type=TestScore.SAT_TOTAL, exam_score=exam_score
+            )
+        User.objects.create(username="2021bwilliam")
+
+        entries = [entry for _, entry in export_users(StringIO(), "ndjson")]
+        User.objects.all().delete()
+
+        def import_entries(import_entries):
+            with tempfile.TemporaryDirectory() as directory:
+                json_file = os.path.join(directory, "users_export.ndjson")
+                with open(json_file, "w", encoding="utf-8") as file:
+                    for entry in import_entries:
+                        file.write(json.dumps(entry) + "\n")
+
+                out = StringIO()
+                with redirect_stdout(out):
+                    import_users_from_json(json_file, sync=True)
+                return out.getvalue()
+
+        def get_rows():
+            return (
+                sorted(
+                    Decision.objects.values_list(
+                        "id", "user__username", "college_id", "admission_status"
+                    )
+                ),
+                sorted(
+                    TestScore.objects.values_list(
+                        "id", "user__username", "exam_type", "exam_score"
+                    )
+                ),
+            )
+
+        # Importing the same export again changes nothing
+        self.assertIn("Processed: 2 (2 created, 0 updated)", import_entries(entries))
+        rows = get_rows()
+        self.assertEqual(2, len(rows[0]))
+        self.assertEqual(2, len(rows[1]))
+        self.assertIn("Processed: 2 (0 created, 2 updated)", import_entries(entries))
+        self.assertEqual(rows, get_rows())
+        self.assertEqual(2, User.objects.count())
+        user = User.objects.get(username="2021awilliam")
+        attending_decision_id = user.attending_decision_id
+        self.assertEqual(college, user.attending_decision.college)
+
+        # A delta with a changed decision and a deleted user
+        delta_entry = json.loads(json.dumps(entries[0]))
+        for decision_info in delta_entry["decisions"]:
+            if decision_info["college_hash"] == other_college.hash:
+                decision_info["admission_status"] = "ADMIT"
+        delta_entry["test_scores"] = delta_entry["test_scores"][:1]
+        output = import_entries(
+            [delta_entry, {"username": "2021bwilliam", "deleted": True}]
+        )
+        self.assertIn("Processed: 1 (0 created, 1 updated)", output)
+        self.assertIn("Deleted: 1", output)
+        self.assertFalse(User.objects.filter(username="2021bwilliam").exists())
+
+        decisions, test_scores = get_rows()
+        self.assertEqual(
+            [
+                (row_id, "2021awilliam", college_id, "ADMIT")
+                for row_id, _, college_id, _ in rows[0]
+            ],
+            decisions,
+        )
+        # One of the two identical test scores is deleted
+        self.assertEqual(1, len(test_scores))
+        self.assertIn(test_scores[0], rows[1])
+
+        # The attending decision is still the same row
+        user.refresh_from_db()
+        self.assertEqual(attending_decision_id, user.attending_decision_id)
+
+
+class JSONStreamTest(SimpleTestCase):
+    """Tests for json_stream.py, which the import scripts parse exports with."""
+
+    DOCUMENT = json.dumps(
+        {
+            "1": {
+                "username": 'Ä "quoted" \\ name',
+                "gpa": 4.0,
+                "scores": [1600, 35, -12, 1.5e-3, 12345678901234567890],
+                "nickname": None,
+                "accepted_terms": True,
+                "decisions": [{"college_hash": "abc", "admission_status": "ADMIT"}],
+            },
+            "2": 123456,
+            "3": -0.5,
+            "4": [],
+            "5": {},
+            "6": "x" * 50,
+        },
+        indent=2,
+        ensure_ascii=False,
+    )
+
+    @staticmethod
+    def iter_json_object(text: str, chunk_size: int) -> list:
+        # The parser is at the top of the repository, next to manage.py
+        json_stream = importlib.import_module("json_stream")
+        return list(json_stream.iter_json_object(StringIO(text), chunk_size))
+
+    def test_matches_json_load(self):
+        """Tests that every chunk size parses the same as json.load."""
+        for document in [
+            self.DOCUMENT,
+            json.dumps(json.loads(self.DOCUMENT), separators=(",", ":")),
+        ]:
+            expected = list(json.load(StringIO(document)).items())
+            for chunk_size in range(1, len(document) + 2):
+                with self.subTest(chunk_size=chunk_size):
+                    self.assertEqual(
+                        expected, self.iter_json_object(document, chunk_size)
+                    )
+
+    def test_numbers_at_chunk_boundaries(self):
+        """Tests that a number cut off by the end of a chunk is read in full."""
+        document = '{"a": 12345, "b": 1.5e10, "c": -0.25}'
+        for chunk_size in range(1, len(document) + 1):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(
+                    [("a", 12345), ("b", 1.5e10), ("c", -0.25)],
+                    self.iter_json_object(document, chunk_size),
+                )
+
+    def test_empty_object(self):
+        for document in ["{}", "  {\n}  \n"]:
+            for chunk_size in [1, 2, 100]:
+                self.assertEqual([], self.iter_json_object(document, chunk_size))
+
+    def test_malformed(self):
+        """Tests that documents json.load rejects raise ValueError."""
+        for document in [
+            "",
+            "   ",
+            "{",
+            '{"a": 1',
+            '{"a": 1,}',
+            '{"a" 1}',
+            '{"a": }',
+            '{"a": tru}',
+            '{"a": 1} x',
+            '{"a": 1}{}',
+            "{1: 2}",
+            '{null: "a"}',
+            '{"a": 12-}',
+        ]:
+            with self.assertRaises(ValueError):
+                json.load(StringIO(document))
+            for chunk_size in [1, 3, 100]:
+                with self.subTest(document=document, chunk_size=chunk_size):
+                    with self.assertRaises(ValueError):
+                        self.iter_json_object(document, chunk_size)
+
+        # Valid JSON, but not an object
+        for document in ["[1, 2]", '"a"', "1"]:
+            with self.subTest(document=document):
+                with self.assertRaises(ValueError):
+                    self.iter_json_object(document, 1)
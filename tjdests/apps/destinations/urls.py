@@ -7,4 +7,5 @@ app_name = "destinations"
 urlpatterns = [
     path("", views.StudentDestinationListView.as_view(), name="students"),
     path("colleges", views.CollegeDestinationListView.as_view(), name="colleges"),
+    path("colleges/autocomplete", views.college_autocomplete_view, name="autocomplete"),
 ]
@@ -1,15 +1,23 @@
 from typing import List, Optional
 
+from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.core.cache import cache
 from django.core.exceptions import PermissionDenied
-from django.db.models import Count, Q, QuerySet
-from django.http import Http404
+from django.db.models import F, Prefetch, Q, QuerySet
+from django.http import Http404, HttpRequest, JsonResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from django.utils.functional import cached_property
 from django.views.generic import ListView
 
+from ..authentication.decorators import require_accept_tos
 from ..authentication.models import User
-from .models import College, Decision
+from .autocomplete import get_college_index
+from .cache import AVAILABLE_YEARS_KEY, CachedListMixin
+from .models import College, CollegeYearStats, Decision
+from .pagination import CursorPaginationMixin
+from .search import get_search_backend
 
 
 def get_current_academic_year() -> int:
@@ -22,35 +30,99 @@ def get_current_academic_year() -> int:
         return current_year
 
 
-def get_available_graduation_years() -> List[int]:
-    """Get list of available graduation years from published user data."""
-    current_year = get_current_academic_year()
+def get_available_graduation_years(current_year: Optional[int] = None) -> List[int]:
+    """
+    Get list of available graduation years from published user data.
 
-    years = (
-        User.objects.filter(publish_data=True, graduation_year__gt=0)
-        .values_list("graduation_year", flat=True)
-        .distinct()
-        .order_by("-graduation_year")
-    )
+    The years are cached until a user's graduation year or publication status
+    changes (see signals.py).
+    """
+    if current_year is None:
+        current_year = get_current_academic_year()
 
-    years_list = list(years)
+    years_list: Optional[List[int]] = cache.get(AVAILABLE_YEARS_KEY)
+    if years_list is None:
+        years_list = list(
+            User.objects.filter(publish_data=True, graduation_year__gt=0)
+            .values_list("graduation_year", flat=True)
+            .distinct()
+            .order_by("-graduation_year")
+        )
+        cache.set(AVAILABLE_YEARS_KEY, years_list, timeout=None)
 
     # Ensure current senior class is always included as first option
-    if current_year not in years_list:
-        years_list.insert(0, current_year)
-    else:
-        # Move current year to first position if it's not already there
-        years_list.remove(current_year)
-        years_list.insert(0, current_year)
+    return [current_year] + [year for year in years_list if year != current_year]
+
+
+def get_selected_year(request: HttpRequest, current_year: Optional[int] = None) -> int:
+    """Get the graduation year selected by the "year" GET parameter."""
+    graduation_year = request.GET.get("year", None)
+    if graduation_year is not None:
+        if not graduation_year.isdigit() or int(graduation_year) == 0:
+            raise Http404()
+        return int(graduation_year)
+
+    # Default to current academic year
+    if current_year is None:
+        current_year = get_current_academic_year()
+    return current_year
+
+
+class GraduationYearMixin:
+    """Works out the years shown by a destinations list once per request."""
+
+    @cached_property
+    def current_academic_year(self) -> int:
+        return get_current_academic_year()
+
+    @cached_property
+    def selected_year(self) -> int:
+        return get_selected_year(self.request, self.current_academic_year)  # type: ignore
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)  # type: ignore
+
+        # Add graduation year context
+        context["selected_year"] = self.selected_year
+        context["available_years"] = get_available_graduation_years(
+            self.current_academic_year
+        )
+        context["current_academic_year"] = self.current_academic_year
 
-    return years_list
+        return context
 
 
 class StudentDestinationListView(
-    LoginRequiredMixin, UserPassesTestMixin, ListView
+    LoginRequiredMixin,
+    UserPassesTestMixin,
+    GraduationYearMixin,
+    CachedListMixin,
+    CursorPaginationMixin,
+    ListView,
 ):  # pylint: disable=too-many-ancestors
     model = User
     paginate_by = 20
+    cursor_ordering = ("last_name", "preferred_name", "id")
+    cache_prefix = "students"
+
+    # Pages of seniors are stored in the cache (on disk, by default), so only
+    # the fields the list shows are loaded; never the password or email.
+    list_fields = (
+        "id",
+        "last_name",
+        "preferred_name",
+        "GPA",
+        "attending_decision_id",
+        "biography",
+        "biography_html",
+        "biography_html_hash",
+    )
+
+    def get_cache_year(self) -> Optional[int]:
+        # The superuser-only view of all data is not cached
+        if self.request.GET.get("all", None) is not None:
+            return None
+        return self.selected_year
 
     def get_queryset(self):
         # Superusers can use the "all" GET parameter to see all data
@@ -63,18 +135,21 @@ class StudentDestinationListView(
             queryset = User.objects.filter(publish_data=True)
 
         # Filter by graduation year
-        graduation_year = self.request.GET.get("year", None)
-        if graduation_year is not None:
-            if not graduation_year.isdigit() or int(graduation_year) == 0:
-                raise Http404()
-            queryset = queryset.filter(graduation_year=int(graduation_year))
-        else:
-            # Default to current academic year
-            current_academic_year = get_current_academic_year()
-            queryset = queryset.filter(graduation_year=current_academic_year)
+        queryset = queryset.filter(graduation_year=self.selected_year)
 
-        queryset = queryset.order_by("last_name", "preferred_name").prefetch_related(
-            "testscore_set"
+        # The template walks every senior's test scores and decisions (and each
+        # decision's college), so fetch them all up front. The attending check
+        # compares IDs in the template, so no per-senior lookup is needed.
+        queryset = (
+            queryset.only(*self.list_fields)
+            .order_by(*self.cursor_ordering)
+            .prefetch_related(
+                "testscore_set",
+                Prefetch(
+                    "decision_set",
+                    queryset=Decision.objects.select_related("college"),
+                ),
+            )
         )
 
         college_id: Optional[str] = self.request.GET.get("college", None)
@@ -87,14 +162,8 @@ class StudentDestinationListView(
 
         search_query = self.request.GET.get("q", None)
         if search_query is not None:
-            queryset = queryset.filter(
-                Q(  # pylint: disable=unsupported-binary-operation
-                    first_name__icontains=search_query
-                )
-                | Q(last_name__icontains=search_query)
-                | Q(nickname__icontains=search_query)
-                | Q(biography__icontains=search_query)
-            )
+            # Results are ordered by relevance
+            queryset = get_search_backend().search(queryset, search_query)
 
         return queryset
 
@@ -111,16 +180,6 @@ class StudentDestinationListView(
         if search_query is not None:
             context["search_query"] = search_query
 
-        # Add graduation year context
-        graduation_year = self.request.GET.get("year", None)
-        if graduation_year is not None:
-            context["selected_year"] = int(graduation_year)
-        else:
-            context["selected_year"] = get_current_academic_year()
-
-        context["available_years"] = get_available_graduation_years()
-        context["current_academic_year"] = get_current_academic_year()
-
         return context
 
     def test_func(self):
@@ -131,10 +190,20 @@ class StudentDestinationListView(
 
 
 class CollegeDestinationListView(
-    LoginRequiredMixin, UserPassesTestMixin, ListView
+    LoginRequiredMixin,
+    UserPassesTestMixin,
+    GraduationYearMixin,
+    CachedListMixin,
+    CursorPaginationMixin,
+    ListView,
 ):  # pylint: disable=too-many-ancestors
     model = College
     paginate_by = 20
+    cursor_ordering = ("name", "id")
+    cache_prefix = "colleges"
+
+    def get_cache_year(self) -> Optional[int]:
+        return self.selected_year
 
     def get_queryset(self) -> QuerySet:
         search_query = self.request.GET.get("q", None)
@@ -145,124 +214,20 @@ class CollegeDestinationListView(
         else:
             queryset = College.objects.all()
 
-        # Get graduation year filter
-        graduation_year = self.request.GET.get("year", None)
-        if graduation_year is not None:
-            if not graduation_year.isdigit() or int(graduation_year) == 0:
-                raise Http404()
-            year_filter = Q(decision__user__graduation_year=int(graduation_year))
-        else:
-            # Default to current academic year
-            current_academic_year = get_current_academic_year()
-            year_filter = Q(decision__user__graduation_year=current_academic_year)
-
+        # Statistics are precomputed per college and year (see stats.py).
+        # Filtering before annotating lets both share a single join.
         queryset = (
-            queryset.annotate(  # type: ignore  # mypy is annoying
-                count_decisions=Count(
-                    "decision",
-                    filter=Q(decision__user__publish_data=True) & year_filter,
-                ),
-                count_attending=Count(
-                    "decision",
-                    filter=Q(
-                        decision__in=Decision.objects.filter(
-                            attending_college__isnull=False
-                        ),
-                        decision__user__publish_data=True,
-                    )
-                    & year_filter,
-                ),
-                count_admit=Count(
-                    "decision",
-                    filter=Q(
-                        decision__admission_status=Decision.ADMIT,
-                        decision__user__publish_data=True,
-                    )
-                    & year_filter,
-                ),
-                count_waitlist=Count(
-                    "decision",
-                    filter=Q(
-                        decision__admission_status=Decision.WAITLIST,
-                        decision__user__publish_data=True,
-                    )
-                    & year_filter,
-                ),
-                count_waitlist_admit=Count(
-                    "decision",
-                    filter=Q(
-                        decision__admission_status=Decision.WAITLIST_ADMIT,
-                        decision__user__publish_data=True,
-                    )
-                    & year_filter,
-                ),
-                count_waitlist_deny=Count(
-                    "decision",
-                    filter=Q(
-                        decision__admission_status=Decision.WAITLIST_DENY,
-                        decision__user__publish_data=True,
-                    )
-                    & year_filter,
-                ),
-                count_defer=Count(
-                    "decision",
-                    filter=Q(
-                        decision__admission_status=Decision.DEFER,
-                        decision__user__publish_data=True,
-                    )
-                    & year_filter,
-                ),
-                count_defer_admit=Count(
-                    "decision",
-                    filter=Q(
-                        decision__admission_status=Decision.DEFER_ADMIT,
-                        decision__user__publish_data=True,
-                    )
-                    & year_filter,
-                ),
-                count_defer_deny=Count(
-                    "decision",
-                    filter=Q(
-                        decision__admission_status=Decision.DEFER_DENY,
-                        decision__user__publish_data=True,
-                    )
-                    & year_filter,
-                ),
-                count_defer_wl=Count(
-                    "decision",
-                    filter=Q(
-                        decision__admission_status=Decision.DEFER_WL,
-                        decision__user__publish_data=True,
-                    )
-                    & year_filter,
-                ),
-                count_defer_wl_admit=Count(
-                    "decision",
-                    filter=Q(
-                        decision__admission_status=Decision.DEFER_WL_A,
-                        decision__user__publish_data=True,
-                    )
-                    & year_filter,
-                ),
-                count_defer_wl_deny=Count(
-                    "decision",
-                    filter=Q(
-                        decision__admission_status=Decision.DEFER_WL_D,
-                        decision__user__publish_data=True,
-                    )
-                    & year_filter,
-                ),
-                count_deny=Count(
-                    "decision",
-                    filter=Q(
-                        decision__admission_status=Decision.DENY,
-                        decision__user__publish_data=True,
-                    )
-                    & year_filter,
-                ),
+            queryset.filter(
+                year_stats__graduation_year=self.selected_year,
+                year_stats__count_decisions__gte=1,
+            )
+            .annotate(
+                **{
+                    field: F(f"year_stats__{field}")
+                    for field in CollegeYearStats.COUNT_FIELDS
+                }
             )
-            .filter(count_decisions__gte=1)
-            .order_by("name")
+            .order_by(*self.cursor_ordering)
         )
 
         return queryset
@@ -276,16 +241,6 @@ class CollegeDestinationListView(
         if search_query is not None:
             context["search_query"] = search_query
 
-        # Add graduation year context
-        graduation_year = self.request.GET.get("year", None)
-        if graduation_year is not None:
-            context["selected_year"] = int(graduation_year)
-        else:
-            context["selected_year"] = get_current_academic_year()
-
-        context["available_years"] = get_available_graduation_years()
-        context["current_academic_year"] = get_current_academic_year()
-
         return context
 
     def test_func(self):
@@ -293,3 +248,17 @@ class CollegeDestinationListView(
         return self.request.user.accepted_terms and not self.request.user.is_banned
 
     template_name = "destinations/college_list.html"
+
+
+@login_required
+@require_accept_tos
+def college_autocomplete_view(request: HttpRequest):
+    """Search colleges by name and location for the decision form."""
+    results = get_college_index().search(request.GET.get("q", ""))
+    return JsonResponse(
+        {
+            "results": [
+                {"id": college_id, "text": label} for college_id, label in results
+            ]
+        }
+    )
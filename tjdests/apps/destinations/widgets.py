@@ -0,0 +1,37 @@
+from typing import Dict
+
+from django import forms
+from django.urls import reverse_lazy
+
+from .models import College
+
+
+class CollegeAutocompleteSelect(forms.Select):
+    """
+    Select widget for a college that only renders the selected college.
+
+    The remaining options are loaded from the autocomplete endpoint as the
+    user types (see main.js), rather than rendering every college in the page.
+    Selected colleges found in the colleges dict (by ID) are not queried.
+    """
+
+    def __init__(self, attrs=None):
+        super().__init__(
+            {
+                **(attrs or {}),
+                "data-autocomplete-url": reverse_lazy("destinations:autocomplete"),
+            }
+        )
+        self.colleges: Dict[str, College] = {}
+
+    def optgroups(self, name, value, attrs=None):
+        selected_ids = [str(v) for v in value if str(v).isdigit()]
+        if all(i in self.colleges for i in selected_ids):
+            selected = [self.colleges[i] for i in selected_ids]
+        else:
+            selected = list(College.objects.filter(id__in=selected_ids))
+
+        self.choices = [("", "---------")] + [
+            (college.id, str(college)) for college in selected
+        ]
+        return super().optgroups(name, value, attrs)
@@ -1,14 +1,21 @@
 from decimal import Decimal
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Tuple
 
 from crispy_forms.helper import FormHelper
 from crispy_forms.layout import Submit
 
 from django import forms
 from django.contrib import messages
+from django.db import transaction
+from django.http import HttpRequest
+from django.utils import timezone
+from django.utils.functional import cached_property
 
 from tjdests.apps.authentication.models import User
-from tjdests.apps.destinations.models import Decision, TestScore
+from tjdests.apps.destinations.cache import invalidate_years
+from tjdests.apps.destinations.models import College, Decision, TestScore
+from tjdests.apps.destinations.stats import refresh_college_stats
+from tjdests.apps.destinations.widgets import CollegeAutocompleteSelect
 
 
 class ProfilePublishForm(forms.ModelForm):
@@ -50,6 +57,10 @@ class ProfilePublishForm(forms.ModelForm):
 
         return cleaned_data
 
+    def save(self, commit: bool = True) -> Any:
+        self.instance.render_biography()
+        return super().save(commit=commit)
+
     class Meta:
         model = User
         fields = [
@@ -66,11 +77,72 @@ class ProfilePublishForm(forms.ModelForm):
         }
 
 
-class DecisionForm(forms.ModelForm):
+class CollegeChoiceField(forms.ModelChoiceField):
+    """
+    College field that looks colleges up in a dict shared by every form in a
+    formset (see BaseDecisionFormSet), rather than querying once per form.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.colleges: Dict[str, College] = {}
+
+    def to_python(self, value):
+        if str(value) in self.colleges:
+            return self.colleges[str(value)]
+        return super().to_python(value)
+
+
+class BaseDecisionForm(forms.ModelForm):
     class Meta:
         model = Decision
         fields = ["college", "decision_type", "admission_status"]
+        field_classes = {"college": CollegeChoiceField}
+        widgets = {"college": CollegeAutocompleteSelect}
+
+    def __init__(self, *args, colleges: Optional[Dict[str, College]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if colleges is not None:
+            self.fields["college"].colleges = colleges  # type: ignore
+            self.fields["college"].widget.colleges = colleges
+
+    def clean(self) -> Dict[str, Any]:
+        cleaned_data = super().clean()
+        assert cleaned_data is not None
+
+        # Rolling and RD decisions cannot be deferred
+        if cleaned_data.get("decision_type") in [
+            Decision.REGULAR_DECISION,
+            Decision.ROLLING,
+        ]:
+            if "DEFER" in cleaned_data.get("admission_status", ""):
+                self.add_error(
+                    "admission_status",
+                    "Regular Decision and Rolling decisions cannot result in a deferral",
+                )
+
+        return cleaned_data
+
+
+def update_attending_decision(request: HttpRequest, decision: Decision) -> None:
+    """Mark the user as attending the college of an early decision admission."""
+    if decision.decision_type in [
+        Decision.EARLY_DECISION,
+        Decision.EARLY_DECISION_2,
+    ]:
+        if decision.admission_status == Decision.ADMIT:
+            request.user.attending_decision = decision  # type: ignore
+            request.user.save()  # type: ignore
+
+            messages.info(
+                request,
+                "You have reported admission on an early decision application; "
+                "therefore, your profile has been updated to indicate "
+                f"that you are attending {decision.college}.",
+            )
 
+
+class DecisionForm(BaseDecisionForm):
     def __init__(self, *args, **kwargs):
         self.request = kwargs.pop("request", None)
         self.is_edit = kwargs.pop("edit", False)
@@ -108,37 +180,205 @@ class DecisionForm(forms.ModelForm):
         ):
             self.add_error("college", "You cannot add a second entry for this college")
 
-        # Rolling and RD decisions cannot be deferred
-        if cleaned_data.get("decision_type") in [
-            Decision.REGULAR_DECISION,
-            Decision.ROLLING,
-        ]:
-            if "DEFER" in cleaned_data.get("admission_status", ""):
-                self.add_error(
-                    "admission_status",
-                    "Regular Decision and Rolling decisions cannot result in a deferral",
-                )
-
         return cleaned_data
 
     def save(self, commit: bool = True) -> Any:
         super().save(commit=commit)
 
         # Check if this is an early decision
-        if self.instance.decision_type in [
-            Decision.EARLY_DECISION,
-            Decision.EARLY_DECISION_2,
-        ]:
-            if self.instance.admission_status == Decision.ADMIT:
-                self.request.user.attending_decision = self.instance
-                self.request.user.save()
-
-                messages.info(
-                    self.request,
-                    "You have reported admission on an early decision application; "
-                    "therefore, your profile has been updated to indicate "
-                    f"that you are attending {self.instance.college}.",
+        update_attending_decision(self.request, self.instance)
+
+
+class BaseDecisionFormSet(forms.BaseModelFormSet):
+    """
+    Formset for entering and editing all of a user's decisions at once.
+
+    Duplicate colleges are caught in memory, and the colleges chosen in every
+    form are fetched with one query. Decisions are saved with bulk queries in
+    a single transaction.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.request = kwargs.pop("request")
+        kwargs.setdefault(
+            "queryset",
+            Decision.objects.filter(user=self.request.user).select_related("college"),
+        )
+        super().__init__(*args, **kwargs)
+
+    @cached_property
+    def colleges(self) -> Dict[str, College]:
+        colleges = {
+            str(decision.college_id): decision.college
+            for decision in self.get_queryset()
+        }
+        if self.is_bound:
+            submitted_ids = {
+                self.data.get(f"{self.add_prefix(i)}-college", "")
+                for i in range(self.total_form_count())
+            }
+            colleges.update(
+                (str(college_id), college)
+                for college_id, college in College.objects.in_bulk(
+                    [value for value in submitted_ids if value.isdigit()]
+                ).items()
+            )
+        return colleges
+
+    def get_form_kwargs(self, index):
+        form_kwargs = super().get_form_kwargs(index)
+        form_kwargs["colleges"] = self.colleges
+        return form_kwargs
+
+    def clean(self) -> None:
+        super().clean()
+
+        seen_college_ids = set()
+        for form in self.forms:
+            if not form.has_changed() and form.instance.pk is None:
+                continue
+            if self._should_delete_form(form):
+                continue
+
+            college = form.cleaned_data.get("college")
+            if college is None:
+                continue
+            if college.id in seen_college_ids:
+                form.add_error(
+                    "college", "You cannot add a second entry for this college"
                 )
+            seen_college_ids.add(college.id)
+
+    def save(self, commit: bool = True) -> Any:
+        user = self.request.user
+        new_decisions = []
+        changed_decisions = []
+        deleted_decisions = []
+
+        for form in self.forms:
+            if not form.has_changed():
+                continue
+            if self._should_delete_form(form):
+                if form.instance.pk is not None:
+                    deleted_decisions.append(form.instance)
+            elif form.instance.pk is None:
+                form.instance.user = user
+                new_decisions.append(form.instance)
+            else:
+                changed_decisions.append(form.instance)
+
+        if not commit:
+            # The caller saves the decisions (and deletes formset.deleted_objects)
+            return super().save(commit=False)
+
+        old_college_ids = dict(
+            Decision.objects.filter(
+                id__in=[decision.id for decision in changed_decisions]
+            ).values_list("id", "college_id")
+        )
+        changed_decisions, new_decisions = self._assign_rows(
+            changed_decisions, new_decisions, old_college_ids
+        )
+
+        # Statistics are refreshed for the colleges decisions were moved from, too
+        college_ids = {
+            decision.college_id
+            for decision in new_decisions + changed_decisions + deleted_decisions
+        } | set(old_college_ids.values())
+
+        with transaction.atomic():
+            Decision.objects.filter(
+                id__in=[decision.id for decision in deleted_decisions]
+            ).delete()
+
+            # Updated before the inserts, which may take colleges they leave
+            now = timezone.now()
+            for decision in changed_decisions:
+                decision.last_modified = now
+            Decision.objects.bulk_update(
+                changed_decisions,
+                ["college", "decision_type", "admission_status", "last_modified"],
+            )
+
+            Decision.objects.bulk_create(new_decisions)
+
+            # Bulk queries do not send the signals that keep these up to date
+            refresh_college_stats(college_ids, [user.graduation_year])
+            if user.publish_data:
+                invalidate_years([user.graduation_year])
+
+        # The attending decision may have been deleted
+        user.refresh_from_db(fields=["attending_decision"])
+
+        # Check for early decisions
+        for decision in new_decisions + changed_decisions:
+            if decision.pk is None:  # not all databases return IDs from bulk inserts
+                decision = Decision.objects.get(user=user, college=decision.college)
+            update_attending_decision(self.request, decision)
+
+        return new_decisions + changed_decisions
+
+    def _assign_rows(
+        self,
+        changed_decisions: List[Decision],
+        new_decisions: List[Decision],
+        old_college_ids: Dict[int, int],
+    ) -> Tuple[List[Decision], List[Decision]]:
+        """
+        Choose the rows that the changed and new decisions are saved to.
+
+        A decision moved to a college that another changed decision is leaving
+        (e.g. two decisions swapping colleges) would conflict with the unique
+        constraint while both are updated. Instead, the row already at a
+        college takes the values entered for it, and rows whose college is no
+        longer entered are moved to the remaining colleges, so no update or
+        insert ever takes a college that is still in use.
+        """
+        kept = []
+        moved = []
+        for decision in changed_decisions:
+            if decision.college_id == old_college_ids.get(decision.id):
+                kept.append(decision)
+            else:
+                moved.append(decision)
+
+        entered = [
+            (decision.college, decision.decision_type, decision.admission_status)
+            for decision in moved + new_decisions
+        ]
+        entered_college_ids = {college.id for college, _, _ in entered}
+        rows_by_college = {old_college_ids.get(row.id): row for row in moved}
+        free_rows = [
+            row
+            for row in moved
+            if old_college_ids.get(row.id) not in entered_college_ids
+        ]
+
+        inserted = []
+        for college, decision_type, admission_status in entered:
+            row = rows_by_college.pop(college.id, None)
+            if row is None and free_rows:
+                row = free_rows.pop()
+
+            if row is None:
+                row = Decision(user=self.request.user)
+                inserted.append(row)
+            else:
+                kept.append(row)
+            row.college = college
+            row.decision_type = decision_type
+            row.admission_status = admission_status
+
+        return kept, inserted
+
+
+DecisionFormSet = forms.modelformset_factory(
+    Decision,
+    form=BaseDecisionForm,
+    formset=BaseDecisionFormSet,
+    extra=10,
+    can_delete=True,
+)
 
 
 class TestScoreForm(forms.ModelForm):
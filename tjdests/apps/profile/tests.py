@@ -1,10 +1,12 @@
 from decimal import Decimal
+from unittest.mock import patch
 
+from django.db import IntegrityError
 from django.http import HttpResponseRedirect
 from django.urls import reverse
 
 from tjdests.apps.authentication.models import User
-from tjdests.apps.destinations.models import College, Decision, TestScore
+from tjdests.apps.destinations.models import College, CollegeYearStats, Decision, TestScore
 from tjdests.test import TJDestsTestCase
 
 
@@ -76,6 +78,7 @@ class ProfileTest(TJDestsTestCase):
                 publish_data=False,
             ).count(),
         )
+        self.assertFalse(User.objects.get(id=user.id).is_biography_html_stale())
 
         # Test creating an admitted decision, then setting that as our destination.
         college = College.objects.get_or_create(name="test college")[0]
@@ -544,11 +547,14 @@ class ProfileTest(TJDestsTestCase):
             college=college, user=user, decision_type="ED", admission_status="ADMIT"
         )[0]
 
-        # Load the update page
+        # Load the update page, which only lists the chosen college
+        College.objects.create(name="other college", location="Alexandria, VA")
         response = self.client.get(
             reverse("profile:decision_edit", kwargs={"pk": decision.id})
         )
         self.assertEqual(200, response.status_code)
+        self.assertIn(str(college), response.content.decode("UTF-8"))
+        self.assertNotIn("other college", response.content.decode("UTF-8"))
 
         # Logging in as someone else should 404
         self.login(
@@ -674,3 +680,248 @@ class ProfileTest(TJDestsTestCase):
         )
         self.assertEqual(302, response.status_code)
         self.assertEqual(0, Decision.objects.filter(id=decision.id).count())
+
+    def test_decision_bulk_edit(self):
+        """Tests the view to add and edit several decisions at once."""
+        url = reverse("profile:decision_bulk_edit")
+
+        self.login(make_student=True, accept_tos=True)
+        self.assertEqual(403, self.client.get(url).status_code)
+
+        user = self.login(
+            make_senior=True, make_student=True, accept_tos=True, publish_data=True
+        )
+        colleges = [
+            College.objects.create(name=f"college {i}", location="Fairfax, VA")
+            for i in range(4)
+        ]
+
+        def post(*rows, initial=0):
+            data = {"form-TOTAL_FORMS": len(rows), "form-INITIAL_FORMS": initial}
+            for i, row in enumerate(rows):
+                for field, value in row.items():
+                    data[f"form-{i}-{field}"] = value
+            return self.client.post(url, data=data)
+
+        response = self.client.get(url)
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(10, len(response.context["formset"].forms))
+
+        # Add several decisions, leaving a row blank
+        response = post(
+            {
+                "college": colleges[0].id,
+                "decision_type": "EA",
+                "admission_status": "ADMIT",
+            },
+            {
+                "college": colleges[1].id,
+                "decision_type": "RD",
+                "admission_status": "DENY",
+            },
+            {"college": "", "decision_type": "", "admission_status": ""},
+        )
+        self.assertEqual(302, response.status_code)
+        self.assertEqual(
+            {colleges[0], colleges[1]},
+            {decision.college for decision in Decision.objects.filter(user=user)},
+        )
+        # Statistics are kept up to date
+        self.assertEqual(
+            1,
+            CollegeYearStats.objects.get(
+                college=colleges[0], graduation_year=user.graduation_year
+            ).count_admit,
+        )
+
+        # Duplicate colleges are rejected, whether new or existing
+        first, second = Decision.objects.filter(user=user).order_by("college__name")
+        response = post(
+            {
+                "id": first.id,
+                "college": colleges[0].id,
+                "decision_type": "EA",
+                "admission_status": "ADMIT",
+            },
+            {
+                "id": second.id,
+                "college": colleges[1].id,
+                "decision_type": "RD",
+                "admission_status": "DENY",
+            },
+            {
+                "college": colleges[0].id,
+                "decision_type": "RD",
+                "admission_status": "DENY",
+            },
+            initial=2,
+        )
+        self.assertEqual(200, response.status_code)
+        self.assertIn(
+            "You cannot add a second entry for this college",
+            response.content.decode("UTF-8"),
+        )
+        self.assertEqual(2, Decision.objects.filter(user=user).count())
+
+        # RD decisions cannot be deferred
+        response = post(
+            {
+                "college": colleges[2].id,
+                "decision_type": "RD",
+                "admission_status": "DEFER",
+            },
+        )
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(2, Decision.objects.filter(user=user).count())
+
+        # Edit, delete and add at once; an ED admission sets the attending college
+        response = post(
+            {
+                "id": first.id,
+                "college": colleges[3].id,
+                "decision_type": "EA",
+                "admission_status": "ADMIT",
+            },
+            {
+                "id": second.id,
+                "college": colleges[1].id,
+                "decision_type": "RD",
+                "admission_status": "DENY",
+                "DELETE": "on",
+            },
+            {
+                "college": colleges[2].id,
+                "decision_type": "ED",
+                "admission_status": "ADMIT",
+            },
+            initial=2,
+        )
+        self.assertEqual(302, response.status_code)
+        self.assertEqual(
+            {colleges[2], colleges[3]},
+            {decision.college for decision in Decision.objects.filter(user=user)},
+        )
+        user.refresh_from_db()
+        self.assertEqual(colleges[2], user.attending_decision.college)
+        self.assertFalse(
+            CollegeYearStats.objects.filter(
+                college__in=[colleges[0], colleges[1]], count_decisions__gt=0
+            ).exists()
+        )
+
+        # Moving a decision to another college and adding its old one
+        third = Decision.objects.get(user=user, college=colleges[2])
+        response = post(
+            {
+                "id": first.id,
+                "college": colleges[0].id,
+                "decision_type": "RD",
+                "admission_status": "WAITLIST",
+            },
+            {
+                "id": third.id,
+                "college": colleges[2].id,
+                "decision_type": "ED",
+                "admission_status": "ADMIT",
+            },
+            {
+                "college": colleges[3].id,
+                "decision_type": "EA",
+                "admission_status": "DENY",
+            },
+            initial=2,
+        )
+        self.assertEqual(302, response.status_code)
+        self.assertEqual(
+            {
+                (colleges[0], "RD", "WAITLIST"),
+                (colleges[2], "ED", "ADMIT"),
+                (colleges[3], "EA", "DENY"),
+            },
+            {
+                (decision.college, decision.decision_type, decision.admission_status)
+                for decision in Decision.objects.filter(user=user)
+            },
+        )
+
+        # Swapping the colleges of two decisions
+        decisions = {
+            decision.college: decision
+            for decision in Decision.objects.filter(user=user)
+        }
+        response = post(
+            {
+                "id": decisions[colleges[0]].id,
+                "college": colleges[3].id,
+                "decision_type": "RD",
+                "admission_status": "WAITLIST",
+            },
+            {
+                "id": decisions[colleges[2]].id,
+                "college": colleges[2].id,
+                "decision_type": "ED",
+                "admission_status": "ADMIT",
+            },
+            {
+                "id": decisions[colleges[3]].id,
+                "college": colleges[0].id,
+                "decision_type": "EA",
+                "admission_status": "DENY",
+            },
+            initial=3,
+        )
+        self.assertEqual(302, response.status_code)
+        self.assertEqual(
+            {
+                (colleges[0], "EA", "DENY"),
+                (colleges[2], "ED", "ADMIT"),
+                (colleges[3], "RD", "WAITLIST"),
+            },
+            {
+                (decision.college, decision.decision_type, decision.admission_status)
+                for decision in Decision.objects.filter(user=user)
+            },
+        )
+        user.refresh_from_db()
+        self.assertEqual(colleges[2], user.attending_decision.college)
+
+        # A conflicting decision saved at the same time is reported, not a 500
+        with patch.object(Decision.objects, "bulk_create", side_effect=IntegrityError):
+            response = post(
+                {
+                    "college": colleges[1].id,
+                    "decision_type": "RD",
+                    "admission_status": "DENY",
+                },
+            )
+        self.assertEqual(200, response.status_code)
+        self.assertIn(
+            "Your decisions were changed while you were editing them",
+            response.content.decode("UTF-8"),
+        )
+        self.assertEqual(3, Decision.objects.filter(user=user).count())
+
+        # Another user's decisions cannot be edited
+        first_college = Decision.objects.get(id=first.id).college
+        other_user = self.login(
+            username="2021awilliam",
+            make_senior=True,
+            make_student=True,
+            accept_tos=True,
+        )
+        response = post(
+            {
+                "id": first.id,
+                "college": colleges[0].id,
+                "decision_type": "RD",
+                "admission_status": "DENY",
+            },
+            initial=1,
+        )
+        self.assertEqual(first_college, Decision.objects.get(id=first.id).college)
+        self.assertEqual(3, Decision.objects.filter(user=user).count())
+        self.assertFalse(
+            Decision.objects.filter(user=other_user)
+            .exclude(college=colleges[0])
+            .exists()
+        )
@@ -18,6 +18,7 @@ urlpatterns = [
         name="testscores_delete",
     ),
     path("decision/add", views.DecisionCreateView.as_view(), name="decision_add"),
+    path("decision/bulk", views.decision_bulk_edit_view, name="decision_bulk_edit"),
     path(
         "decision/edit/<int:pk>",
         views.DecisionUpdateView.as_view(),
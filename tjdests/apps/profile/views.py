@@ -4,15 +4,17 @@ from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib.messages.views import SuccessMessageMixin
+from django.core.exceptions import PermissionDenied
+from django.db import IntegrityError
 from django.http import HttpRequest
-from django.shortcuts import render
+from django.shortcuts import redirect, render
 from django.urls import reverse
 from django.views.generic import CreateView, DeleteView, UpdateView
 
 from tjdests.apps.authentication.decorators import require_accept_tos
 from tjdests.apps.destinations.models import Decision, TestScore
 
-from .forms import DecisionForm, ProfilePublishForm, TestScoreForm
+from .forms import DecisionForm, DecisionFormSet, ProfilePublishForm, TestScoreForm
 
 
 @login_required
@@ -41,6 +43,33 @@ def profile_view(request: HttpRequest):
     return render(request, "profile/profile.html", context=context)
 
 
+@login_required
+@require_accept_tos
+def decision_bulk_edit_view(request: HttpRequest):
+    """Add, edit and delete all of the user's decisions on one page."""
+    if not request.user.can_update_profile:  # type: ignore
+        raise PermissionDenied()
+
+    if request.method == "POST":
+        formset = DecisionFormSet(request.POST, request=request)
+        if formset.is_valid():
+            try:
+                formset.save()
+            except IntegrityError:
+                # e.g. the same college added in another tab at the same time
+                formset.non_form_errors().append(
+                    "Your decisions were changed while you were editing them. "
+                    "Please check them and try again."
+                )
+            else:
+                messages.success(request, "Decisions saved successfully.")
+                return redirect("profile:index")
+    else:
+        formset = DecisionFormSet(request=request)
+
+    return render(request, "profile/decision_bulk_form.html", {"formset": formset})
+
+
 class TestScoreCreateView(
     LoginRequiredMixin, SuccessMessageMixin, UserPassesTestMixin, CreateView
 ):
@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/3.2/ref/settings/
 import logging
 import os
 import sys
+from datetime import timedelta
 from pathlib import Path
 from typing import List, Optional
 
@@ -100,6 +101,33 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+# The cache must be shared between worker processes, since cached
+# destinations pages are invalidated through it.
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": BASE_DIR / "cache",
+    }
+}
+
+# How long to cache each page of the destinations lists, in seconds
+DESTINATIONS_CACHE_TIMEOUT = 60 * 10
+
+
+# Sessions
+# https://docs.djangoproject.com/en/3.2/topics/http/sessions/
+# The session is loaded on nearly every page, since most pages require login.
+#   cached_db: read from the cache, and written to both the cache and the database
+#   cache: only stored in the cache, so clearing the cache logs everyone out
+#   signed_cookies: stored in the browser; sessions can't be ended server side
+#     (e.g. by logging out) before SESSION_COOKIE_AGE
+
+SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -118,6 +146,17 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Django's default hashers, plus wrapped legacy PBKDF2 hashes
+# (see migrate_password_hashes)
+PASSWORD_HASHERS = [
+    "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "tjdests.apps.authentication.hashers.PBKDF2WrappedPasswordHasher",
+    "tjdests.apps.authentication.hashers.PBKDF2WrappedSHA1PasswordHasher",
+]
+
 AUTH_USER_MODEL = "authentication.User"
 
 AUTHENTICATION_BACKENDS = (
@@ -127,7 +166,22 @@ AUTHENTICATION_BACKENDS = (
     "django.contrib.auth.backends.ModelBackend",
 )
 
+# Dotted path to the search backend used for the student list.
+# Defaults to full-text search on SQLite and PostgreSQL; see destinations/search.py
+STUDENT_SEARCH_BACKEND: Optional[str] = None
+
+# Use keyset (cursor) pagination on the destinations lists instead of page numbers
+DESTINATIONS_CURSOR_PAGINATION = False
+
 AXES_LOCKOUT_CALLABLE = "tjdests.apps.authentication.views.lockout"
+
+# Count failed logins in the cache, and only save lockouts to the database
+# (see authentication/lockouts.py)
+AXES_HANDLER = "tjdests.apps.authentication.lockouts.SlidingWindowCacheHandler"
+AXES_CACHE = "default"
+
+# The sliding window in which AXES_FAILURE_LIMIT failed logins lock a client out
+LOGIN_FAILURE_WINDOW = timedelta(hours=1)
 MAINTAINER = ""
 
 SOCIAL_AUTH_REDIRECT_IS_HTTPS = False
@@ -176,6 +230,11 @@ MESSAGE_TAGS = {
 TESTING = any("test" in arg for arg in sys.argv)
 if TESTING:
     AXES_ENABLED = False
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
 
 # Override the following in secret.py
 BRANDING_NAME: str = "UNDEFINED"
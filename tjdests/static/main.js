@@ -9,6 +9,27 @@ $(document).ready(function(){
     window.matchMedia('(prefers-color-scheme: dark)').addEventListener('change', setThemeFromSystem);
 
     $("select").each(function(){
+        var autocompleteUrl = $(this).data("autocomplete-url");
+        if (autocompleteUrl) {
+            // Options are searched on the server rather than rendered in the page
+            new TomSelect("#" + this.id, {
+                allowEmptyOption: true,
+                "plugins": ["change_listener"],
+                valueField: "id",
+                labelField: "text",
+                searchField: [],
+                shouldLoad: function(query) {
+                    return query.length > 0;
+                },
+                load: function(query, callback) {
+                    fetch(autocompleteUrl + "?q=" + encodeURIComponent(query))
+                        .then(function(response) { return response.json(); })
+                        .then(function(json) { callback(json.results); })
+                        .catch(function() { callback(); });
+                }
+            });
+            return;
+        }
         new TomSelect("#" + this.id, {allowEmptyOption: true, "plugins": ["change_listener"]});
     });
     $(function () {
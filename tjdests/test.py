@@ -1,3 +1,4 @@
+from django.core.cache import cache
 from django.http import HttpRequest
 from django.test import TestCase
 from django.utils import timezone
@@ -6,6 +7,11 @@ from tjdests.apps.authentication.models import User
 
 
 class TJDestsTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+        # The cache is not rolled back between tests like the database is
+        cache.clear()
+
     def login(  # pylint: disable=too-many-positional-arguments,too-many-arguments
         self,
         username: str = "awilliam",